@@ -1,5 +1,7 @@
 import os
 import jwt
+from functools import lru_cache
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
 from fastapi import HTTPException, status
 from dotenv import load_dotenv
 
@@ -21,6 +23,13 @@ if CLEAN_PEM.startswith("-----BEGIN PUBLIC KEY-----") and "\n" not in CLEAN_PEM:
         "-----END PUBLIC KEY-----", "\n-----END PUBLIC KEY-----"
     )
 
+
+@lru_cache(maxsize=4)
+def _load_public_key(pem: str):
+    """Parse the PEM once; jwt.decode would otherwise re-parse it per request."""
+    return load_pem_public_key(pem.encode("utf-8"))
+
+
 # Production-grade JWK Client for ES256 (Fallback)
 jwks_client = None
 if SUPABASE_URL:
@@ -72,7 +81,10 @@ def verify_token(token: str) -> dict:
             # Primary: Local PEM
             # print("DEBUG: Using local PEM for ES256 verification") # Reduced spam
             payload = jwt.decode(
-                token, CLEAN_PEM, algorithms=["ES256"], options={"verify_aud": False}
+                token,
+                _load_public_key(CLEAN_PEM),
+                algorithms=["ES256"],
+                options={"verify_aud": False},
             )
         elif jwks_client:
             # Fallback: JWKS Remote Fetch
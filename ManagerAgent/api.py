@@ -7,6 +7,7 @@ load_dotenv()
 import uuid
 import json
 import asyncio
+import importlib
 from contextlib import asynccontextmanager
 from typing import Optional, List
 from datetime import datetime, timedelta
@@ -43,8 +44,18 @@ async def lifespan(app: FastAPI):
                 await checkpointer.setup()
     except Exception as e:
         print(f"Lifespan Startup Error (RAG Pool): {e}")
-        
+
+    # Warm the sentiment model in the background so the first request is fast
+    warmup_task = asyncio.create_task(_warm_article_service())
+    # Likewise import the stock agent stack (yfinance, Wolfram, Tavily tools)
+    import_task = asyncio.create_task(
+        asyncio.to_thread(importlib.import_module, "StockAgents.services.agent_engine")
+    )
+
     yield
+
+    warmup_task.cancel()
+    import_task.cancel()
     
     # Shutdown: Close the pool
     try:
@@ -55,6 +66,44 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Lifespan Shutdown Error: {e}")
 
+    # Shutdown: Release pooled HTTP connections
+    from StockAgents.services.finnhub_client import finnhub_client
+    from StockAgents.services.llm_service import llm_service
+    from StockAgents.tools.tavily_tool import tavily_http
+    from StockAgents.tools.yfinance_tool import yahoo_http
+    for name, client in (
+        ("Finnhub", finnhub_client),
+        ("LLM", llm_service),
+        ("Tavily", tavily_http),
+        ("Yahoo", yahoo_http),
+    ):
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"Lifespan Shutdown Error ({name} client): {e}")
+
+    # Shutdown: Close the on-disk candle cache
+    from StockAgents.services.persistent_cache import candle_cache
+    try:
+        candle_cache.close()
+    except Exception as e:
+        print(f"Lifespan Shutdown Error (candle cache): {e}")
+
+    # Shutdown: Drop queued blocking work and release pool threads
+    from StockAgents.core.executor import io_executor
+    io_executor.shutdown(wait=False, cancel_futures=True)
+
+async def _warm_article_service():
+    """Import the article service (torch/transformers) and load its model off the event loop."""
+    try:
+        module = await asyncio.to_thread(
+            importlib.import_module, "StockAgents.services.article_service"
+        )
+    except Exception as e:
+        print(f"[ArticleService] Import failed: {e}")
+        return
+    await module.article_service.warmup()
+
 app = FastAPI(
     title="Financial Calculation Agent API",
     lifespan=lifespan
@@ -198,16 +247,17 @@ def save_chat_pair(user_id: str, session_id: str, user_query: str, agent_respons
                     (session_id, user_id, user_query[:50] if user_query else "New Conversation"),
                 )
 
-                # 2. Insert User message
+                # 2. Insert User then Agent message in one round trip;
+                # VALUES rows take seq_id in order, preserving turn order
                 cursor.execute(
-                    "INSERT INTO chat_history (user_id, session_id, role, content) VALUES (%s, %s, %s, %s)",
-                    (user_id, session_id, "User", user_query),
-                )
-
-                # 3. Insert Agent message
-                cursor.execute(
-                    "INSERT INTO chat_history (user_id, session_id, role, content) VALUES (%s, %s, %s, %s)",
-                    (user_id, session_id, "Agent", agent_response),
+                    """
+                    INSERT INTO chat_history (user_id, session_id, role, content)
+                    VALUES (%s, %s, %s, %s), (%s, %s, %s, %s)
+                """,
+                    (
+                        user_id, session_id, "User", user_query,
+                        user_id, session_id, "Agent", agent_response,
+                    ),
                 )
         print(f"DEBUG: Successfully saved message pair for session {session_id}")
     except Exception as e:
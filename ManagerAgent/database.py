@@ -16,8 +16,12 @@ def init_pool():
         print("Initializing Supabase Postgres Connection Pool...")
         pool = ConnectionPool(
             conninfo=SUPABASE_DB_URL,
-            min_size=1,
+            min_size=4,  # Keep warm connections so first queries skip the TLS handshake
             max_size=20,
+            max_lifetime=1800,  # Recycle before Supabase/PGBouncer drops them
+            max_idle=300,
+            check=ConnectionPool.check_connection,  # Pre-ping on checkout
+            open=True,
             kwargs={
                 "row_factory": dict_row,
                 "prepare_threshold": None,  # Disable prepared statements for PGBouncer (Transaction Pooling)
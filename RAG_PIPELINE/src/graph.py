@@ -334,6 +334,8 @@ if settings.SUPABASE_DB_URL:
         rag_pool = AsyncConnectionPool(
             conninfo=settings.SUPABASE_DB_URL,
             max_size=10,
+            max_lifetime=1800,
+            check=AsyncConnectionPool.check_connection,
             kwargs=connection_kwargs,
             open=False # Defer connection opening
         )
@@ -1,8 +1,6 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
-from dotenv import load_dotenv
-
-load_dotenv()
 
 
 class Settings(BaseSettings):
@@ -29,6 +27,12 @@ class Settings(BaseSettings):
     FINNHUB_API_KEY: Optional[str] = None
     TAVILY_API_KEY: Optional[str] = None
 
+    # Prompts: use the compressed _V2 agent prompts (A/B against _V1)
+    COMPACT_PROMPTS: bool = False
+
+    # On-disk cache for daily market data (shared across restarts)
+    CACHE_DIR: str = "~/.blueprint_cache"
+
     # Formatting
     DISCLAIMER_TEXT: str = "Note: I am an AI financial analyst. My insights are for informational purposes — please verify strategies with a qualified professional."
 
@@ -37,4 +41,10 @@ class Settings(BaseSettings):
     )
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Process-wide Settings singleton (env and .env are parsed once)."""
+    return Settings()
+
+
+settings = get_settings()
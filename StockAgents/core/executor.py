@@ -0,0 +1,15 @@
+"""
+Shared thread pool for blocking I/O (yfinance, Wolfram, Tavily SDK calls).
+
+All sub-agents submit to this one pool so concurrent requests don't starve
+each other behind small per-module pools. The blocking libraries release the
+GIL while waiting on sockets, so the pool is sized for in-flight requests
+rather than CPU cores.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="agent-io")
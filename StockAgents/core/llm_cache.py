@@ -0,0 +1,66 @@
+"""
+LLM Cache - Exact-match, single-flight memo for deterministic LLM calls.
+
+Ticker resolution and holdings extraction run at temperature 0, so the same
+query (modulo case, whitespace and trailing punctuation) always gets the same
+answer. Keys include PROMPT_VERSION so a prompt change invalidates old entries.
+
+Similarity-based (embedding) matching is deliberately not used: "Analyze AAPL"
+and "Analyze AAPT" embed almost identically but need different answers.
+"""
+
+import asyncio
+import functools
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from StockAgents.core.prompts import PROMPT_VERSION
+
+T = TypeVar("T")
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace, case and trailing punctuation."""
+    return " ".join(query.split()).rstrip(" ?!.").lower()
+
+
+class LLMCache:
+    """
+    Bounded LRU of tasks keyed by (namespace, prompt version, query).
+    Concurrent callers with the same key share a single in-flight request;
+    failures are never cached.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._futures: "OrderedDict[Hashable, asyncio.Task]" = OrderedDict()
+
+    @staticmethod
+    def key(namespace: str, query: str) -> Hashable:
+        return (namespace, PROMPT_VERSION, normalize_query(query))
+
+    async def get_or_compute(
+        self, namespace: str, query: str, compute: Callable[[], Awaitable[T]]
+    ) -> T:
+        key = self.key(namespace, query)
+        task = self._futures.get(key)
+        if task is not None:
+            self._futures.move_to_end(key)
+            return await asyncio.shield(task)
+
+        # Run detached so a cancelled caller never cancels it for the waiters
+        task = asyncio.get_running_loop().create_task(compute())
+        task.add_done_callback(functools.partial(self._forget_failure, key))
+        self._futures[key] = task
+        if len(self._futures) > self.maxsize:
+            self._futures.popitem(last=False)
+        return await asyncio.shield(task)
+
+    def _forget_failure(self, key: Hashable, task: asyncio.Task) -> None:
+        # Don't cache failures; exception() also marks them as retrieved
+        if task.cancelled() or task.exception() is not None:
+            if self._futures.get(key) is task:
+                del self._futures[key]
+
+    def clear(self) -> None:
+        self._futures.clear()
@@ -0,0 +1,60 @@
+"""
+Compact JSON for LLM prompts, stream frames and caches.
+
+Prompts never need indentation: whitespace only adds input tokens. orjson is
+used when installed (several times faster on large tool payloads); numpy
+values and other unknown types fall back to str() either way.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Longest series kept when trimming prompt payloads (~a month of daily bars)
+MAX_LIST_ITEMS = 20
+
+# Time-series keys (candles, price history). These are stored oldest-first,
+# so trimming keeps the tail; ranked or newest-first lists are left whole.
+SERIES_KEYS = frozenset({"c", "o", "h", "l", "v", "t", "dates", "prices"})
+
+def dumps(obj: Any) -> str:
+    """Serialize to compact JSON."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            obj,
+            default=str,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+    return json.dumps(obj, default=str, separators=(",", ":"))
+
+
+def loads(data: "str | bytes") -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def trim_lists(obj: Any, max_items: int = MAX_LIST_ITEMS) -> Any:
+    """
+    Copy of obj with every time series (see SERIES_KEYS) cut to its last
+    max_items points. Other lists are kept in full.
+    """
+    if isinstance(obj, dict):
+        return {
+            k: v[-max_items:] if k in SERIES_KEYS and _is_sequence(v) else trim_lists(v, max_items)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        return [trim_lists(v, max_items) for v in obj]
+    return obj
+
+
+def _is_sequence(value: Any) -> bool:
+    # Lists, tuples and numpy arrays (but not numpy scalars)
+    return isinstance(value, (list, tuple)) or getattr(value, "ndim", 0) > 0
@@ -0,0 +1,90 @@
+"""
+Ticker universe and regex fast-path for ticker resolution.
+
+Lets the LLM services skip a round trip when the user already typed the
+ticker symbols (e.g. "How is NVDA doing", "Compare AAPL and MSFT").
+"""
+
+import csv
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import List, Optional
+
+TICKERS_CSV_PATH = os.path.join(os.path.dirname(__file__), "tickers.csv")
+
+# Upper-case tokens that look like a ticker symbol, incl. share classes (BRK.B, BRK-B)
+TICKER_RE = re.compile(r"\b([A-Z]{1,5}(?:[.-][A-Z])?)\b")
+WORD_RE = re.compile(r"[A-Za-z]+(?:[.'][A-Za-z]+)*")
+
+# Words that can surround explicit tickers without naming another company.
+# If a query contains any other word it may mention a company by name, so we
+# fall back to the LLM.
+FAST_PATH_WORDS = frozenset(
+    """
+    a about against an analyse analysis analyze and any at between buy chart
+    check compare comparison current deep dive do does doing for give has have
+    how i in is it latest look me my news now of on or outlook performance
+    please price prices quote right risk sell share shares should show stock
+    stocks tell the to today trading up down versus vs what what's whats with
+    """.split()
+)
+
+
+def load_known_tickers(path: str = TICKERS_CSV_PATH) -> frozenset:
+    """Load the packaged ticker universe (one symbol per row)."""
+    try:
+        with open(path, newline="") as f:
+            return frozenset(
+                row["symbol"].strip().upper() for row in csv.DictReader(f)
+            )
+    except OSError as e:
+        print(f"[tickers] Could not load ticker universe: {e}")
+        return frozenset()
+
+
+KNOWN_TICKERS = load_known_tickers()
+
+
+@lru_cache(maxsize=4096)
+def normalize_ticker(symbol: str) -> str:
+    """
+    Upper-cased, stripped symbol, interned so the hot portfolio loops reuse
+    one string object per ticker instead of allocating on every call.
+    """
+    return sys.intern(symbol.upper().strip())
+
+
+def validate_ticker(symbol: str) -> Optional[str]:
+    """
+    Normalize an LLM-produced symbol, or return None if it isn't a ticker.
+    The packaged universe is not a full exchange listing, so well-formed
+    symbols outside it (DJT, TCEHY, BRK-B) are still accepted and logged.
+    """
+    if not symbol:
+        return None
+    symbol = symbol.strip().upper()
+    if symbol in KNOWN_TICKERS:
+        return symbol
+    if TICKER_RE.fullmatch(symbol):
+        print(f"[tickers] Accepting symbol outside the ticker universe: {symbol}")
+        return symbol
+    return None
+
+
+def find_explicit_tickers(query: str) -> Optional[List[str]]:
+    """
+    Return the tickers typed in the query, in order of mention, when the query
+    is unambiguous; otherwise None so the caller falls back to the LLM.
+
+    Single-letter symbols are never taken from the fast path ("I", "A").
+    """
+    tickers: List[str] = []
+    for word in WORD_RE.findall(query):
+        if TICKER_RE.fullmatch(word) and len(word) > 1 and word in KNOWN_TICKERS:
+            if word not in tickers:
+                tickers.append(word)
+        elif word.lower() not in FAST_PATH_WORDS:
+            return None
+    return tickers or None
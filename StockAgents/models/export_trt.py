@@ -0,0 +1,75 @@
+"""
+Export the trained sentiment model to a TensorRT engine for GPU serving.
+Runs after training: HF checkpoint -> ONNX (via optimum) -> TensorRT plan (via trtexec).
+The resulting plan can be served from Triton with dynamic batching enabled.
+"""
+
+import os
+import shutil
+import subprocess
+
+# File paths
+SCRIPT_DIR = os.path.dirname(__file__)
+MODEL_PATH = os.path.join(SCRIPT_DIR, "sentiment_model")
+ONNX_DIR = os.path.join(SCRIPT_DIR, "sentiment_model_onnx")
+ENGINE_PATH = os.path.join(SCRIPT_DIR, "sentiment_model.plan")
+
+# Dynamic shape profile: batch 1-64, sequence length up to training's max_length
+MAX_BATCH = 64
+OPT_BATCH = 32
+MAX_LENGTH = 256
+OPT_LENGTH = 64
+
+
+def export_onnx():
+    """Export the HF checkpoint to ONNX. Returns the .onnx path or None."""
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from transformers import AutoTokenizer
+    except ImportError:
+        print("✗ optimum[onnxruntime] is not installed")
+        return None
+
+    print(f"Exporting {MODEL_PATH} to ONNX...")
+    model = ORTModelForSequenceClassification.from_pretrained(MODEL_PATH, export=True)
+    model.save_pretrained(ONNX_DIR)
+    AutoTokenizer.from_pretrained(MODEL_PATH).save_pretrained(ONNX_DIR)
+    onnx_path = os.path.join(ONNX_DIR, "model.onnx")
+    print(f"✓ ONNX model saved to: {onnx_path}")
+    return onnx_path
+
+
+def build_engine(onnx_path):
+    """Compile the ONNX model into a TensorRT engine with trtexec."""
+    trtexec = shutil.which("trtexec")
+    if trtexec is None:
+        print("✗ trtexec not found on PATH (install TensorRT)")
+        return None
+
+    def shape(batch, length):
+        return f"input_ids:{batch}x{length},attention_mask:{batch}x{length}"
+
+    cmd = [
+        trtexec,
+        f"--onnx={onnx_path}",
+        f"--saveEngine={ENGINE_PATH}",
+        f"--minShapes={shape(1, 1)}",
+        f"--optShapes={shape(OPT_BATCH, OPT_LENGTH)}",
+        f"--maxShapes={shape(MAX_BATCH, MAX_LENGTH)}",
+        # FP16 needs no calibration set; INT8 without one loses accuracy
+        "--fp16",
+    ]
+    print("Building TensorRT engine...")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"✗ trtexec failed:\n{result.stderr[-2000:]}")
+        return None
+
+    print(f"✓ TensorRT engine saved to: {ENGINE_PATH}")
+    return ENGINE_PATH
+
+
+if __name__ == "__main__":
+    onnx_path = export_onnx()
+    if onnx_path:
+        build_engine(onnx_path)
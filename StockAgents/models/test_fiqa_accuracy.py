@@ -4,23 +4,111 @@ This evaluates how well our model performs on professionally-labeled financial s
 """
 
 import os
+import numpy as np
 import pandas as pd
-from transformers import pipeline
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+from sklearn.metrics import classification_report
+
+# Optional: ONNX Runtime INT8 inference for CPU-only machines
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+# Use Arrow's multithreaded CSV parser when pyarrow is installed
+try:
+    import pyarrow  # noqa: F401
+
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 
 # File paths
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "sentiment_model")
+QUANTIZED_MODEL_PATH = os.path.join(os.path.dirname(__file__), "sentiment_model_int8")
 TEST_DATA_PATH = os.path.join(
     os.path.dirname(__file__), "training_data", "FiQA-PhraseBank.csv"
 )
 
+# Batched inference settings (MAX_LENGTH matches training)
+BATCH_SIZE = 64
+CHUNK_SIZE = 512
+MAX_LENGTH = 256
+
+LABELS = ["negative", "neutral", "positive"]
+LABEL_INDEX = {label: i for i, label in enumerate(LABELS)}
+LABEL_TABLE = {
+    "NEGATIVE": "negative",
+    "LABEL_0": "negative",
+    "NEUTRAL": "neutral",
+    "LABEL_1": "neutral",
+    "POSITIVE": "positive",
+    "LABEL_2": "positive",
+}
+
+
+def export_quantized():
+    """Export the model to ONNX with dynamic INT8 quantization (AVX512-VNNI)."""
+    if not ORT_AVAILABLE:
+        print("✗ optimum[onnxruntime] is not installed")
+        return None
+
+    print(f"Exporting {MODEL_PATH} to ONNX...")
+    ort_model = ORTModelForSequenceClassification.from_pretrained(MODEL_PATH, export=True)
+    quantizer = ORTQuantizer.from_pretrained(ort_model)
+    quantizer.quantize(
+        save_dir=QUANTIZED_MODEL_PATH,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False),
+    )
+    AutoTokenizer.from_pretrained(MODEL_PATH).save_pretrained(QUANTIZED_MODEL_PATH)
+    print(f"✓ Quantized model saved to: {QUANTIZED_MODEL_PATH}")
+    return QUANTIZED_MODEL_PATH
+
 
 def load_model():
     """Load the sentiment classification model."""
+    use_cuda = torch.cuda.is_available()
+
+    # On CPU, prefer the INT8 ONNX export when one has been made
+    if not use_cuda and ORT_AVAILABLE and os.path.isdir(QUANTIZED_MODEL_PATH):
+        print(f"Loading quantized model from: {QUANTIZED_MODEL_PATH}")
+        try:
+            classifier = pipeline(
+                "text-classification",
+                model=ORTModelForSequenceClassification.from_pretrained(
+                    QUANTIZED_MODEL_PATH, file_name="model_quantized.onnx"
+                ),
+                tokenizer=AutoTokenizer.from_pretrained(QUANTIZED_MODEL_PATH),
+            )
+            print("✓ Model loaded successfully!")
+            return classifier
+        except Exception as e:
+            print(f"  Quantized model failed to load, using {MODEL_PATH}: {e}")
+
     print(f"Loading model from: {MODEL_PATH}")
     try:
+        # Half precision on GPU; CPUs without native bf16 run it slower than fp32
+        model = AutoModelForSequenceClassification.from_pretrained(
+            MODEL_PATH,
+            torch_dtype=torch.float16 if use_cuda else torch.float32,
+            low_cpu_mem_usage=True,  # Load weights directly, skip random init
+        )
+        model.eval()
+        if use_cuda:
+            try:
+                # Batches are padded per batch, so compile for dynamic shapes
+                model = torch.compile(model, dynamic=True)
+            except Exception as e:
+                print(f"  torch.compile unavailable, running eager: {e}")
         classifier = pipeline(
-            "text-classification", model=MODEL_PATH, tokenizer=MODEL_PATH
+            "text-classification",
+            model=model,
+            tokenizer=AutoTokenizer.from_pretrained(MODEL_PATH),
+            device=0 if use_cuda else -1,
         )
         print("✓ Model loaded successfully!")
         return classifier
@@ -32,17 +120,16 @@ def load_model():
 def load_test_data():
     """Load the FiQA-PhraseBank test dataset."""
     print(f"Loading test data from: {TEST_DATA_PATH}")
-    df = pd.read_csv(TEST_DATA_PATH)
-
-    # Drop any rows with null values
-    df = df.dropna(subset=["Sentence", "Sentiment"])
+    df = pd.read_csv(TEST_DATA_PATH, engine=CSV_ENGINE)
 
-    # Standardize sentiment labels to lowercase
-    df["Sentiment"] = df["Sentiment"].str.strip().str.lower()
+    # Standardize sentiment labels; anything outside LABELS becomes NaN
+    sentiment = df["Sentiment"].str.strip().str.lower()
+    df["Sentiment"] = pd.Categorical(
+        sentiment.where(sentiment.isin(LABELS)), categories=LABELS
+    )
 
-    # Filter to only valid sentiments
-    valid_sentiments = {"positive", "negative", "neutral"}
-    df = df[df["Sentiment"].isin(valid_sentiments)]
+    # Drop null sentences and invalid sentiments
+    df = df.dropna(subset=["Sentence", "Sentiment"])
 
     print(f"✓ Loaded {len(df)} test samples")
     print(f"  Distribution: {df['Sentiment'].value_counts().to_dict()}")
@@ -51,15 +138,7 @@ def load_test_data():
 
 def map_model_output(label):
     """Map model output labels to standardized sentiment."""
-    label = label.upper()
-    if label in ["NEGATIVE", "LABEL_0"]:
-        return "negative"
-    elif label in ["NEUTRAL", "LABEL_1"]:
-        return "neutral"
-    elif label in ["POSITIVE", "LABEL_2"]:
-        return "positive"
-    else:
-        return label.lower()
+    return LABEL_TABLE.get(label.upper(), label.lower())
 
 
 def run_evaluation(sample_size=None):
@@ -80,44 +159,38 @@ def run_evaluation(sample_size=None):
     print(f"Testing on {len(df)} samples from FiQA-PhraseBank")
     print("=" * 60)
 
+    # Truncate to 512 chars for the model
+    sentences = df["Sentence"].str.slice(0, 512).tolist()
+    true_labels = df["Sentiment"].tolist()
+
+    evaluated = []
     y_true = []
     y_pred = []
-    results = []
-
-    total = len(df)
-    for idx, (_, row) in enumerate(df.iterrows()):
-        sentence = row["Sentence"]
-        true_label = row["Sentiment"].lower()
-
-        if (idx + 1) % 500 == 0:
-            print(f"  Processing {idx + 1}/{total}...")
+    confidences = []
 
+    total = len(sentences)
+    for start in range(0, total, CHUNK_SIZE):
+        chunk = sentences[start : start + CHUNK_SIZE]
         try:
-            # Run prediction (truncate to 512 chars for model)
-            result = classifier(sentence[:512])[0]
-            pred_label = map_model_output(result["label"])
-            confidence = result["score"]
-
-            y_true.append(true_label)
-            y_pred.append(pred_label)
-
-            results.append(
-                {
-                    "sentence": sentence[:60] + "..."
-                    if len(sentence) > 60
-                    else sentence,
-                    "true_label": true_label,
-                    "pred_label": pred_label,
-                    "confidence": confidence,
-                    "correct": true_label == pred_label,
-                }
-            )
-
+            with torch.inference_mode():
+                outputs = classifier(
+                    chunk, batch_size=BATCH_SIZE, truncation=True, max_length=MAX_LENGTH
+                )
         except Exception as e:
-            print(f"Error processing: {sentence[:50]}... - {e}")
+            print(f"Error processing samples {start}-{start + len(chunk)}: {e}")
+            continue
+
+        evaluated.extend(chunk)
+        y_true.extend(true_labels[start : start + len(chunk)])
+        y_pred.extend(map_model_output(r["label"]) for r in outputs)
+        confidences.extend(r["score"] for r in outputs)
+        print(f"  Processing {min(start + CHUNK_SIZE, total)}/{total}...")
 
-    # Calculate metrics
-    accuracy = accuracy_score(y_true, y_pred)
+    # Calculate metrics on label indices (-1 for labels outside LABELS)
+    true_idx = np.array([LABEL_INDEX.get(label, -1) for label in y_true], dtype=np.intp)
+    pred_idx = np.array([LABEL_INDEX.get(label, -1) for label in y_pred], dtype=np.intp)
+    correct_mask = true_idx == pred_idx
+    accuracy = float(correct_mask.mean()) if len(correct_mask) else 0.0
 
     print("\n" + "=" * 60)
     print(f"OVERALL ACCURACY: {accuracy * 100:.2f}%")
@@ -128,39 +201,44 @@ def run_evaluation(sample_size=None):
         classification_report(
             y_true,
             y_pred,
-            target_names=["negative", "neutral", "positive"],
+            target_names=LABELS,
             zero_division=0,
         )
     )
 
     print("\n📈 Confusion Matrix:")
-    cm = confusion_matrix(y_true, y_pred, labels=["negative", "neutral", "positive"])
+    cm = np.zeros((len(LABELS), len(LABELS)), dtype=np.int64)
+    known = (true_idx >= 0) & (pred_idx >= 0)
+    np.add.at(cm, (true_idx[known], pred_idx[known]), 1)
     print("                Predicted:")
     print("                neg    neu    pos")
     print(f"True negative  {cm[0][0]:4d}  {cm[0][1]:4d}  {cm[0][2]:4d}")
     print(f"True neutral   {cm[1][0]:4d}  {cm[1][1]:4d}  {cm[1][2]:4d}")
     print(f"True positive  {cm[2][0]:4d}  {cm[2][1]:4d}  {cm[2][2]:4d}")
 
+    def short(sentence):
+        return sentence[:60] + "..." if len(sentence) > 60 else sentence
+
     # Show some incorrect predictions
-    incorrect = [r for r in results if not r["correct"]]
-    if incorrect:
-        print(f"\n❌ Sample Incorrect Predictions ({len(incorrect)}/{len(results)}):")
+    incorrect = np.flatnonzero(~correct_mask)
+    if len(incorrect):
+        print(f"\n❌ Sample Incorrect Predictions ({len(incorrect)}/{len(evaluated)}):")
         print("-" * 80)
-        for r in incorrect[:8]:  # Show first 8
-            print(f"Sentence: {r['sentence']}")
+        for i in incorrect[:8]:  # Show first 8
+            print(f"Sentence: {short(evaluated[i])}")
             print(
-                f"  True: {r['true_label']:8s} | Pred: {r['pred_label']:8s} (conf: {r['confidence']:.2f})"
+                f"  True: {y_true[i]:8s} | Pred: {y_pred[i]:8s} (conf: {confidences[i]:.2f})"
             )
             print()
 
     # Show some correct predictions
-    correct = [r for r in results if r["correct"]]
-    if correct:
-        print(f"\n✅ Sample Correct Predictions ({len(correct)}/{len(results)}):")
+    correct = np.flatnonzero(correct_mask)
+    if len(correct):
+        print(f"\n✅ Sample Correct Predictions ({len(correct)}/{len(evaluated)}):")
         print("-" * 80)
-        for r in correct[:5]:  # Show first 5
-            print(f"Sentence: {r['sentence']}")
-            print(f"  Label: {r['true_label']:8s} (conf: {r['confidence']:.2f})")
+        for i in correct[:5]:  # Show first 5
+            print(f"Sentence: {short(evaluated[i])}")
+            print(f"  Label: {y_true[i]:8s} (conf: {confidences[i]:.2f})")
             print()
 
     return accuracy, y_true, y_pred
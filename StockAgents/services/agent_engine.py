@@ -12,14 +12,70 @@ Architecture:
 """
 
 import asyncio
-from typing import Dict, Any, List
+import hashlib
+from contextlib import aclosing
+from typing import Callable, Dict, Any, List, Optional
 from pydantic import BaseModel, Field
-import json
+from StockAgents.core.llm_cache import LLMCache
+from StockAgents.core.serialization import dumps, trim_lists
+from StockAgents.core.tickers import normalize_ticker
+from datetime import datetime
 from .finnhub_client import finnhub_client
+from .base_agent import TokenCallback
 from .llm_service import llm_service
-from StockAgents.core.prompts import MAIN_AGENT_PROMPT, PLANNER_SYSTEM_PROMPT
+from .quant_agent import quant_agent
+from .researcher_agent import researcher_agent
+from StockAgents.core.prompts import (
+    MAIN_AGENT_PROMPT,
+    PLANNER_SYSTEM_PROMPT,
+    SYNTH_INSTRUCTIONS_PROMPT,
+)
 
-# System Prompt for the Main Agent (Portfolio Manager)
+# System Prompt for the Main Agent (Portfolio Manager) when synthesizing.
+# Fully static so providers can cache it as a shared prefix.
+SYNTH_SYSTEM_PROMPT = (
+    MAIN_AGENT_PROMPT
+    + "\n\nACT AS A SYNTHESIZER. Combine the tool outputs into a coherent response matching the user's intent."
+    + "\n"
+    + SYNTH_INSTRUCTIONS_PROMPT
+)
+
+
+# Max tool steps in flight at once per request (Finnhub / Gemini rate limits)
+MAX_PARALLEL_STEPS = 5
+
+# Max number of (query, context) pairs whose plans are memoized
+PLAN_CACHE_SIZE = 512
+
+# Streamed synthesis tokens are flushed when either bound is reached
+TOKEN_FLUSH_INTERVAL = 0.03  # seconds
+TOKEN_FLUSH_CHARS = 64
+
+
+# Returned by _next_chunk once the synthesis stream is exhausted
+_STREAM_END = object()
+
+
+async def _next_chunk(chunks):
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return _STREAM_END
+
+
+async def _forward_agent_tokens(events: asyncio.Queue, wave: asyncio.Future):
+    """Yield sub-agent token events as they are queued, until the wave is done."""
+    while not wave.done():
+        getter = asyncio.ensure_future(events.get())
+        try:
+            await asyncio.wait({getter, wave}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        if getter.done() and not getter.cancelled():
+            yield getter.result()
+    while not events.empty():
+        yield events.get_nowait()
 
 
 # --- Planner Models ---
@@ -34,6 +90,9 @@ class PlannerStep(BaseModel):
     description: str = Field(
         ..., description="Brief description of what this step does"
     )
+    depends_on: List[int] = Field(
+        [], description="Indices of earlier steps that must finish first"
+    )
 
 
 class ExecutionPlan(BaseModel):
@@ -43,9 +102,50 @@ class ExecutionPlan(BaseModel):
     )
 
 
+# Sent with every planner call so output matches ExecutionPlan. Written out
+# inline (no $defs/$ref) with every tool argument declared, since Gemini's
+# structured output drops undeclared keys from free-form objects.
+_PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "reasoning": {"type": "string"},
+        "steps": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "tool": {
+                        "type": "string",
+                        "enum": ["market_scan", "get_stock_data", "quant_analysis", "news_research"],
+                    },
+                    "args": {
+                        "type": "object",
+                        "properties": {
+                            "ticker": {"type": "string"},
+                            "query": {"type": "string"},
+                            "sector": {"type": "string"},
+                            "min_change_percent": {"type": "number"},
+                        },
+                    },
+                    "description": {"type": "string"},
+                    "depends_on": {"type": "array", "items": {"type": "integer"}},
+                },
+                "required": ["tool", "args", "description"],
+            },
+        },
+    },
+    "required": ["reasoning", "steps"],
+}
+_PLAN_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "ExecutionPlan", "schema": _PLAN_SCHEMA},
+}
+
+
 class LLMPlanner:
     def __init__(self, llm_client):
         self.client = llm_client
+        self.cache = LLMCache(maxsize=PLAN_CACHE_SIZE)
         # Define available tools for the planner
         self.tools_schema = """
         AVAILABLE TOOLS:
@@ -68,8 +168,23 @@ class LLMPlanner:
     async def create_plan(
         self, user_query: str, user_context: Dict[str, Any] = {}
     ) -> ExecutionPlan:
+        """
+        Plans are deterministic (temperature 0) given the query and context, so
+        they are memoized on both; the context is part of the key because it
+        changes the plan (e.g. holdings questions).
+        """
+        context_str = dumps(user_context)
+        fingerprint = hashlib.sha256(context_str.encode("utf-8")).hexdigest()
+        plan = await self.cache.get_or_compute(
+            f"plan:{fingerprint}",
+            user_query,
+            lambda: self._fetch_plan(user_query, context_str),
+        )
+        # Callers get their own copy of the shared cached plan
+        return plan.model_copy(deep=True)
+
+    async def _fetch_plan(self, user_query: str, context_str: str) -> ExecutionPlan:
         # Format prompt with tools AND user context
-        context_str = json.dumps(user_context, indent=2, default=str)
         system_prompt = PLANNER_SYSTEM_PROMPT.format(
             tools_schema=self.tools_schema, user_context=context_str
         )
@@ -81,7 +196,7 @@ class LLMPlanner:
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_query},
                 ],
-                response_format={"type": "json_object"},
+                response_format=_PLAN_RESPONSE_FORMAT,
                 temperature=0.0,
             )
             content = response.choices[0].message.content
@@ -96,12 +211,116 @@ class AgentEngine:
     def __init__(self):
         self.planner = LLMPlanner(llm_service.client)
 
-    async def run_workflow_stream(self, user_query: str, user_context: Dict[str, Any]):
+    @staticmethod
+    def _plan_waves(steps: List[PlannerStep]) -> List[List[int]]:
+        """
+        Group step indices into waves: every step runs in the wave after the
+        latest step it depends on. Only earlier steps count as dependencies,
+        so a malformed plan can't deadlock.
+        """
+        levels: List[int] = []
+        for i, step in enumerate(steps):
+            deps = [levels[d] for d in step.depends_on if 0 <= d < i]
+            levels.append(max(deps) + 1 if deps else 0)
+
+        waves: List[List[int]] = [[] for _ in range(max(levels, default=-1) + 1)]
+        for i, level in enumerate(levels):
+            waves[level].append(i)
+        return waves
+
+    @staticmethod
+    async def _fetch_stock_data(ticker: str):
+        """Quote and daily candles are independent calls; fetch them together."""
+        return await asyncio.gather(
+            finnhub_client.get_quote(ticker),
+            finnhub_client.get_candles(ticker, resolution="D"),
+        )
+
+    def _prefetch_stock_data(self, plan: ExecutionPlan) -> Dict[str, asyncio.Future]:
+        """
+        Start quote/candle fetches for every get_stock_data ticker in the plan
+        up front, once per distinct ticker; steps await the shared futures.
+        """
+        tasks: Dict[str, asyncio.Future] = {}
+        for step in plan.steps:
+            ticker = step.args.get("ticker") if step.tool == "get_stock_data" else None
+            # Malformed args are left for the step itself to report
+            if not isinstance(ticker, str) or not ticker.strip():
+                continue
+            ticker = normalize_ticker(ticker)
+            if ticker not in tasks:
+                tasks[ticker] = asyncio.ensure_future(self._fetch_stock_data(ticker))
+        return tasks
+
+    @staticmethod
+    def _batch_quant_steps(
+        steps: List[PlannerStep],
+        stream_to: Optional[Callable[[PlannerStep], TokenCallback]] = None,
+    ) -> Dict[str, asyncio.Future]:
+        """
+        When a wave has quant_analysis steps for several tickers, analyze them
+        with one QuantAgent.run_many call (one history download, one Wolfram
+        batch); steps await the shared future. With `stream_to`, each ticker's
+        assessment is streamed to the callback of its first step.
+        """
+        callbacks: Dict[str, Optional[TokenCallback]] = {}
+        for step in steps:
+            ticker = step.args.get("ticker") if step.tool == "quant_analysis" else None
+            if isinstance(ticker, str) and ticker.strip():
+                ticker = normalize_ticker(ticker)
+                if ticker not in callbacks:
+                    callbacks[ticker] = stream_to(step) if stream_to else None
+        tickers = list(callbacks)
+        if len(tickers) < 2:
+            return {}
+
+        def on_token(ticker: str, delta: str):
+            if callbacks[ticker]:
+                callbacks[ticker](delta)
+
+        async def run_batch():
+            return dict(zip(tickers, await quant_agent.run_many(tickers, on_token=on_token)))
+
+        batch = asyncio.ensure_future(run_batch())
+        return {ticker: batch for ticker in tickers}
+
+    async def _run_wave(self, steps: List[PlannerStep], execute_step) -> List[Any]:
         """
-        Streaming version of run_workflow.
+        Run one wave of independent steps concurrently. The semaphore is per
+        call: waves of one request run in sequence, so this bounds a request's
+        steps without making other users' plans queue behind it.
+        """
+        step_limit = asyncio.Semaphore(MAX_PARALLEL_STEPS)
+
+        async def run_with_limit(step: PlannerStep):
+            async with step_limit:
+                return await execute_step(step)
+
+        results = await asyncio.gather(
+            *(run_with_limit(step) for step in steps), return_exceptions=True
+        )
+        return [
+            {"error": f"Step failed: {str(r)}"} if isinstance(r, BaseException) else r
+            for r in results
+        ]
+
+    async def run_workflow_stream(
+        self,
+        user_query: str,
+        user_context: Dict[str, Any],
+        state: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Plan, execute and synthesize, streaming progress as it happens.
         Yields:
             Reading: {"type": "status", "content": "..."}
+            Agents:  {"type": "agent_token", "step": i, "tool": "...", "content": "..."}
             Tokens:  {"type": "token", "content": "..."}
+            Charts:  {"type": "data", "content": "<json>"}
+        agent_token events carry the quant/research sub-agents' text as it is
+        written, before synthesis starts; only "token" events are the answer.
+        If `state` is given, it is filled with the plan, step results and
+        chart data (used by run_workflow).
         """
         # 1. Plan
         yield {"type": "status", "content": "Planning analysis..."}
@@ -111,8 +330,20 @@ class AgentEngine:
         # 2. Execute
         execution_results = {}
         charts_data = {}
+        if state is not None:
+            state.update(
+                plan=plan, execution_results=execution_results, charts=charts_data
+            )
+
+        # Sub-agent deltas are queued by step and forwarded while a wave runs
+        agent_tokens: asyncio.Queue = asyncio.Queue()
+        step_index = {id(step): i for i, step in enumerate(plan.steps)}
 
-        # Helper to run tools safely (Same as sync)
+        def stream_to(step: PlannerStep) -> TokenCallback:
+            event = {"type": "agent_token", "step": step_index[id(step)], "tool": step.tool}
+            return lambda delta: agent_tokens.put_nowait({**event, "content": delta})
+
+        # Helper to run tools safely
         async def execute_step(step: PlannerStep):
             try:
                 if step.tool == "market_scan":
@@ -122,27 +353,26 @@ class AgentEngine:
                     )
                 elif step.tool == "get_stock_data":
                     ticker = step.args.get("ticker")
-                    if not ticker:
+                    if not isinstance(ticker, str) or not ticker.strip():
                         return {"error": "Missing ticker argument for get_stock_data"}
-                    ticker = ticker.upper()
-                    quote = await finnhub_client.get_quote(ticker)
-                    candles = await finnhub_client.get_candles(ticker, resolution="D")
+                    ticker = normalize_ticker(ticker)
+                    # Prefetched for every get_stock_data step in the plan
+                    quote, candles = await asyncio.shield(stock_data[ticker])
                     # Store chart data separately for frontend
                     if candles.get("s") == "ok":
                         charts_data[ticker] = candles.get("c", [])
                     return {"quote": quote, "candles": candles}
                 elif step.tool == "quant_analysis":
-                    from .quant_agent import quant_agent
-
                     ticker = step.args.get("ticker")
                     if not ticker:
                         return {"error": "Missing ticker argument for quant_analysis"}
-                    return await quant_agent.run(ticker)
+                    ticker = normalize_ticker(ticker)
+                    if ticker in quant_batch:
+                        return (await asyncio.shield(quant_batch[ticker]))[ticker]
+                    return await quant_agent.run(ticker, on_token=stream_to(step))
                 elif step.tool == "news_research":
-                    from .researcher_agent import researcher_agent
-
                     return await researcher_agent.run(
-                        step.args.get("query", user_query)
+                        step.args.get("query", user_query), on_token=stream_to(step)
                     )
                 else:
                     return {"error": f"Unknown tool: {step.tool}"}
@@ -157,186 +387,107 @@ class AgentEngine:
             "news_research": "Reading News...",
         }
 
-        # Execute steps sequentially
-        for i, step in enumerate(plan.steps):
-            display_status = tool_display_names.get(step.tool, "Working...")
-            yield {"type": "status", "content": display_status}
-            result = await execute_step(step)
-            execution_results[f"step_{i}_{step.tool}"] = result
-
-        # Yield Chart Data if available
-        if charts_data:
-            import json
-            yield {
-                "type": "data",
-                "content": json.dumps({"charts": charts_data})
-            }
-
-        # 3. Synthesize (Streaming)
-        yield {"type": "status", "content": "Synthesizing recommendation..."}
-        async for chunk in self._generate_recommendation_stream(
-            user_query, plan, execution_results, user_context
-        ):
-            yield chunk
+        # Abandoned streams (client disconnect) must not leave fetches running
+        stock_data = self._prefetch_stock_data(plan)
+        quant_batch: Dict[str, asyncio.Future] = {}
+        wave_task: Optional[asyncio.Future] = None
+        try:
+            # Execute independent steps concurrently, wave by wave: sub-agents
+            # (quant, research) and data fetches are network-bound calls.
+            for wave in self._plan_waves(plan.steps):
+                steps = [plan.steps[i] for i in wave]
+                if len(steps) > 1:
+                    display_status = f"Running {len(steps)} analyses in parallel..."
+                else:
+                    display_status = tool_display_names.get(steps[0].tool, "Working...")
+                yield {"type": "status", "content": display_status}
+
+                quant_batch.clear()
+                quant_batch.update(self._batch_quant_steps(steps, stream_to))
+                wave_task = asyncio.ensure_future(self._run_wave(steps, execute_step))
+                async with aclosing(
+                    _forward_agent_tokens(agent_tokens, wave_task)
+                ) as events:
+                    async for event in events:
+                        yield event
+                results = await wave_task
+                for i, step, result in zip(wave, steps, results):
+                    execution_results[f"step_{i}_{step.tool}"] = result
+
+            # Yield Chart Data if available
+            if charts_data:
+                yield {
+                    "type": "data",
+                    "content": dumps({"charts": charts_data})
+                }
+
+            # 3. Synthesize (Streaming)
+            yield {"type": "status", "content": "Synthesizing recommendation..."}
+            async with aclosing(
+                self._generate_recommendation_stream(
+                    user_query, plan, execution_results, user_context
+                )
+            ) as synthesis:
+                async for chunk in synthesis:
+                    yield chunk
+        finally:
+            for task in (*stock_data.values(), *quant_batch.values()):
+                task.cancel()
+            if wave_task is not None:
+                wave_task.cancel()
 
     async def run_workflow(
         self, user_query: str, user_context: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
         Orchestrate the OODA loop: Observe, Analyze, Decide, Act.
-        Dynamic execution based on LLM Plan.
+        Non-streaming wrapper that collects run_workflow_stream.
         """
-        # ... (Original implementation kept for backward compatibility if needed, logic duplicated for simplicity in prompt)
-        # Using run_workflow_stream internally and collecting result would be DRY-er but more complex change.
-        # For minimal diff, I'll keep the original run_workflow as is.
-        # 1. Plan
-        plan = await self.planner.create_plan(user_query, user_context)
-        print(f"Generated Plan: {plan.dict()}")
-
-        # 2. Execute
-        execution_results = {}
-        charts_data = {}
-
-        # Helper to run tools safely
-        async def execute_step(step: PlannerStep):
-            try:
-                if step.tool == "market_scan":
-                    return await finnhub_client.filter_market_movers(
-                        step.args.get("sector", "Technology"),
-                        min_change_percent=step.args.get("min_change_percent", 0),
-                    )
-                elif step.tool == "get_stock_data":
-                    ticker = step.args.get("ticker")
-                    if not ticker:
-                        return {"error": "Missing ticker argument for get_stock_data"}
-                    ticker = ticker.upper()
-                    quote = await finnhub_client.get_quote(ticker)
-                    candles = await finnhub_client.get_candles(ticker, resolution="D")
-                    if candles.get("s") == "ok":
-                        charts_data[ticker] = candles.get("c", [])
-                    return {"quote": quote, "candles": candles}
-                elif step.tool == "quant_analysis":
-                    from .quant_agent import quant_agent
-
-                    ticker = step.args.get("ticker")
-                    if not ticker:
-                        return {"error": "Missing ticker argument for quant_analysis"}
-                    return await quant_agent.run(ticker)
-                elif step.tool == "news_research":
-                    from .researcher_agent import researcher_agent
-
-                    return await researcher_agent.run(
-                        step.args.get("query", user_query)
-                    )
-                else:
-                    return {"error": f"Unknown tool: {step.tool}"}
-            except Exception as e:
-                return {"error": f"Step failed: {str(e)}"}
-
-        # Execute steps sequentially
-        for i, step in enumerate(plan.steps):
-            result = await execute_step(step)
-            execution_results[f"step_{i}_{step.tool}"] = result
-
-        # 3. Synthesize
-        recommendation = await self._generate_recommendation(
-            user_query, plan, execution_results, user_context
-        )
+        state: Dict[str, Any] = {}
+        tokens = []
+        async for chunk in self.run_workflow_stream(user_query, user_context, state):
+            if chunk["type"] == "token":
+                tokens.append(chunk["content"])
 
         return {
             "intent": "dynamic_plan",
-            "plan": plan.dict(),
+            "plan": state["plan"].dict(),
             "analysis": {
-                "charts": charts_data,  # For frontend visualization
-                "results": execution_results,
+                "charts": state["charts"],  # For frontend visualization
+                "results": state["execution_results"],
             },
-            "recommendation": recommendation,
+            "recommendation": "".join(tokens),
         }
 
-    async def _generate_recommendation(
+    def _build_synth_messages(
         self,
         query: str,
         plan: ExecutionPlan,
         results: Dict,
-        user_context: Dict[str, Any] = {},
-    ) -> str:
+        user_context: Dict[str, Any],
+    ) -> List[Dict[str, str]]:
         """
-        Synthesize results into a final answer.
+        Build the synthesis chat messages. Payloads are serialized compactly,
+        and long series in tool outputs are cut to their most recent entries.
         """
-        from datetime import datetime
-
-        context_str = json.dumps(results, indent=2, default=str)
-        user_context_str = json.dumps(user_context, indent=2, default=str)
-        plan_str = json.dumps(plan.dict(), indent=2)
+        context_str = dumps(trim_lists(results))
+        user_context_str = dumps(user_context)
+        plan_str = dumps(plan.dict())
         current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        # Use simple synthesis based on Main Agent Persona
-        system_prompt = (
-            MAIN_AGENT_PROMPT
-            + "\n\nACT AS A SYNTHESIZER. Combine the tool outputs into a coherent response matching the user's intent."
+        # Static instructions live in SYNTH_SYSTEM_PROMPT; only request data here
+        user_msg = (
+            f"Current Date: {current_date}\n\n"
+            f"User Portfolio Context:\n{user_context_str}\n\n"
+            f"User Query: {query}\n\n"
+            f"Execution Plan:\n{plan_str}\n\n"
+            f"Tool Outputs:\n{context_str}"
         )
 
-        user_msg = f"""
-        Current Date: {current_date}
-        User Query: {query}
-        
-        User Portfolio Context:
-        {user_context_str}
-        
-        Execution Plan:
-        {plan_str}
-        
-        Tool Outputs:
-        {context_str}
-        
-        Instructions:
-        1. **PRIORITY**: If the user asks about their holdings (e.g., "how many", "do I own"), YOU MUST answer that first using the 'User Portfolio Context'.
-        2. Answer the user's question directly.
-        3. Use the data from Tool Outputs to back up your claims.
-        3. If multiple stocks were analyzed, provide a comparison.
-        4. If a 'quant_analysis' was done, include the Analyst Score and Risk warning.
-        5. EXPLICITLY mention the 'Current Date' provided above when stating prices or status.
-        6. Do not mention "Knowledge Cutoff".
-7. **CITATIONS**: When referencing news or data, use the links provided in the Tool Outputs to cite your sources inline. Format: `[🔗](url)` or `[[Source]](url)`.
-7. **CITATIONS**: When referencing news or data, use the links provided in the Tool Outputs to cite your sources inline. Format: `[🔗](url)` or `[[Source]](url)`.
-        
-        7.  **SCORING RULES (CRITICAL):**
-            - **START with the analystConsensusScore** from the Quant report — this is based on 30-50+ Wall Street professionals.
-            - Only adjust the score by ±10 points based on recent news from the Researcher.
-            - **TRANSPARENCY RULE**: If you adjust the score, **YOU MUST STATE WHY**.
-            - *Bad Example*: "Score: 68/100" (when raw was 72).
-            - *Good Example*: "Score adjusted from 72 (Consensus) to 68 due to recent negative regulatory news."
-
-        8.  **RECOMMENDATION THRESHOLDS:**
-            - Under 40 → STRONG SELL
-            - 40-50 → WEAK SELL
-            - 50-65 → HOLD
-            - 65-72 → MODERATE BUY
-            - Above 72 → STRONG BUY
-
-            - Output format: "Score: X/100 — RECOMMENDATION"
-
-        **FORMATTING RULES (CRITICAL):**
-        - **USE MARKDOWN TABLES** for any comparison data (Price, Score, P/E, etc.).
-        - **Structure your response** as: 
-            1. **Executive Summary** (Table)
-            2. **Deep Dive** (Bullet points)
-            3. **Verdict** (Conclusion)
-        - **DO NOT** include a "Disclaimer" or "I am an AI" statement in your text body. This is handled by the user interface globally.
-        """
-
-        try:
-            response = await llm_service.client.chat.completions.create(
-                model="gemini-2.5-flash",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_msg},
-                ],
-                temperature=0.5,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error generating recommendation: {e}. Raw Data: {str(results)}"
+        return [
+            {"role": "system", "content": SYNTH_SYSTEM_PROMPT},
+            {"role": "user", "content": user_msg},
+        ]
 
     async def _generate_recommendation_stream(
         self,
@@ -348,86 +499,57 @@ class AgentEngine:
         """
         Streamed synthesis.
         """
-        from datetime import datetime
-
-        context_str = json.dumps(results, indent=2, default=str)
-        user_context_str = json.dumps(user_context, indent=2, default=str)
-        plan_str = json.dumps(plan.dict(), indent=2)
-        current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Use simple synthesis based on Main Agent Persona (Same prompt as sync)
-        system_prompt = (
-            MAIN_AGENT_PROMPT
-            + "\n\nACT AS A SYNTHESIZER. Combine the tool outputs into a coherent response matching the user's intent."
-        )
-
-        user_msg = f"""
-        Current Date: {current_date}
-        User Query: {query}
-        
-        User Portfolio Context:
-        {user_context_str}
-        
-        Execution Plan:
-        {plan_str}
-        
-        Tool Outputs:
-        {context_str}
-        
-        Instructions:
-        1. **PRIORITY**: If the user asks about their holdings (e.g., "how many", "do I own"), YOU MUST answer that first using the 'User Portfolio Context'.
-        2. Answer the user's question directly.
-        3. Use the data from Tool Outputs to back up your claims.
-        3. If multiple stocks were analyzed, provide a comparison.
-        4. If a 'quant_analysis' was done, include the Analyst Score and Risk warning.
-        5. EXPLICITLY mention the 'Current Date' provided above when stating prices or status.
-        6. Do not mention "Knowledge Cutoff".
-        
-        7. **CITATIONS**: When referencing news or data, use the links provided in the Tool Outputs to cite your sources inline. Format: `[🔗](url)` or `[[Source]](url)`.
-        
-        7.  **SCORING RULES (CRITICAL):**
-            - **START with the analystConsensusScore** from the Quant report — this is based on 30-50+ Wall Street professionals.
-            - Only adjust the score by ±10 points based on recent news from the Researcher.
-            - **TRANSPARENCY RULE**: If you adjust the score, **YOU MUST STATE WHY**.
-            - *Bad Example*: "Score: 68/100" (when raw was 72).
-            - *Good Example*: "Score adjusted from 72 (Consensus) to 68 due to recent negative regulatory news."
-
-        8.  **RECOMMENDATION THRESHOLDS:**
-            - Under 40 → STRONG SELL
-            - 40-50 → WEAK SELL
-            - 50-65 → HOLD
-            - 65-72 → MODERATE BUY
-            - Above 72 → STRONG BUY
-
-            - Output format: "Score: X/100 — RECOMMENDATION"
-
-        **FORMATTING RULES (CRITICAL):**
-        - **USE MARKDOWN TABLES** for any comparison data (Price, Score, P/E, etc.).
-        - **Structure your response** as: 
-            1. **Executive Summary** (Table)
-            2. **Deep Dive** (Bullet points)
-            3. **Verdict** (Conclusion)
-        - **DO NOT** include a "Disclaimer" or "I am an AI" statement in your text body. This is handled by the user interface globally.
-        """
-
+        messages = self._build_synth_messages(query, plan, results, user_context)
+        stream = None
+        pending = None
         try:
             stream = await llm_service.client.chat.completions.create(
                 model="gemini-2.5-flash",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_msg},
-                ],
+                messages=messages,
                 temperature=0.5,
                 stream=True,
             )
 
-            async for chunk in stream:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    yield {"type": "token", "content": chunk.choices[0].delta.content}
-                    await asyncio.sleep(0)  # Force buffer flush
+            # Coalesce deltas into small time/size-bounded frames. The next
+            # chunk is awaited with a deadline, so buffered text still goes
+            # out on time when the model pauses between deltas.
+            loop = asyncio.get_running_loop()
+            chunks = stream.__aiter__()
+            buffer = ""
+            last_flush = loop.time()
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(_next_chunk(chunks))
+                timeout = None
+                if buffer:
+                    timeout = max(0.0, last_flush + TOKEN_FLUSH_INTERVAL - loop.time())
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if done:
+                    chunk = pending.result()
+                    pending = None
+                    if chunk is _STREAM_END:
+                        break
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        buffer += chunk.choices[0].delta.content
+                if buffer and (
+                    not done
+                    or len(buffer) >= TOKEN_FLUSH_CHARS
+                    or loop.time() - last_flush >= TOKEN_FLUSH_INTERVAL
+                ):
+                    yield {"type": "token", "content": buffer}
+                    buffer = ""
+                    last_flush = loop.time()
+            if buffer:
+                yield {"type": "token", "content": buffer}
 
         except Exception as e:
             yield {"type": "token", "content": f"Error generating recommendation: {e}."}
+        finally:
+            # Release the HTTP connection if the consumer stops early
+            if pending is not None:
+                pending.cancel()
+            if stream is not None:
+                await stream.close()
 
 
 agent_engine = AgentEngine()
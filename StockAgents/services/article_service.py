@@ -2,10 +2,29 @@
 Article Service: Fetches news and runs sentiment analysis.
 """
 
+import asyncio
+import threading
 from transformers import pipeline
+import torch
 import yfinance as yf
 from typing import Dict, List, Any
 import os
+import numpy as np
+from StockAgents.core.executor import io_executor
+
+# Optional: INT8 ONNX Runtime model for CPU inference
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+
+SENTIMENTS = ("Positive", "Negative", "Neutral")
+SENTIMENT_INDEX = {label: i for i, label in enumerate(SENTIMENTS)}
 
 
 class ArticleService:
@@ -13,49 +32,91 @@ class ArticleService:
 
     def __init__(self):
         self.classifier = None
+        self._load_lock = threading.Lock()
         self.model_path = os.path.join(
             os.path.dirname(__file__), "..", "models", "sentiment_model"
         )
+        # Written by StockAgents/models/test_fiqa_accuracy.py:export_quantized()
+        self.quantized_model_path = os.path.join(
+            os.path.dirname(__file__), "..", "models", "sentiment_model_int8"
+        )
+
+    def _load_quantized(self):
+        """Load the INT8 ONNX model if one was exported, else return None."""
+        if not (ORT_AVAILABLE and os.path.isdir(self.quantized_model_path)):
+            return None
+        try:
+            session_options = ort.SessionOptions()
+            session_options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+            model = ORTModelForSequenceClassification.from_pretrained(
+                self.quantized_model_path,
+                file_name="model_quantized.onnx",
+                session_options=session_options,
+            )
+            return pipeline(
+                "text-classification",
+                model=model,
+                tokenizer=AutoTokenizer.from_pretrained(self.quantized_model_path),
+            )
+        except Exception as e:
+            print(f"[ArticleService] Failed to load quantized model: {e}")
+            return None
 
     def load_model(self):
-        """Lazy load the sentiment model on first use."""
+        """Lazy load the sentiment model on first use (or at startup via warmup)."""
         if self.classifier is None:
-            try:
-                print(
-                    f"[ArticleService] Loading sentiment model from {self.model_path}"
-                )
-                self.classifier = pipeline(
-                    "text-classification",
-                    model=self.model_path,
-                    tokenizer=self.model_path,
-                )
-                print("[ArticleService] Model loaded successfully")
-            except Exception as e:
-                print(
-                    f"[ArticleService] Failed to load custom model: {e}. Using fallback."
-                )
-                self.classifier = pipeline("sentiment-analysis")
+            # warmup() loads in a worker thread; don't let a request load twice
+            with self._load_lock:
+                if self.classifier is None:
+                    self.classifier = self._build_classifier()
+
+    def _build_classifier(self):
+        use_cuda = torch.cuda.is_available()
+        if not use_cuda:
+            classifier = self._load_quantized()
+            if classifier is not None:
+                print("[ArticleService] Loaded INT8 ONNX sentiment model")
+                return classifier
+        try:
+            print(f"[ArticleService] Loading sentiment model from {self.model_path}")
+            classifier = pipeline(
+                "text-classification",
+                model=self.model_path,
+                tokenizer=self.model_path,
+                device=0 if use_cuda else -1,
+                torch_dtype=torch.float16 if use_cuda else torch.float32,
+                model_kwargs={"local_files_only": True},
+            )
+            print("[ArticleService] Model loaded successfully")
+            return classifier
+        except Exception as e:
+            print(f"[ArticleService] Failed to load custom model: {e}. Using fallback.")
+            return pipeline("sentiment-analysis")
+
+    async def warmup(self):
+        """Load the model off the event loop so the first request doesn't pay for it."""
+        try:
+            await asyncio.to_thread(self.load_model)
+        except Exception as e:
+            print(f"[ArticleService] Warmup failed: {e}")
+
+    # Model labels -> Positive/Negative/Neutral; anything unknown is Neutral
+    _LABEL_MAP = {
+        "NEGATIVE": "Negative",
+        "LABEL_0": "Negative",
+        "POSITIVE": "Positive",
+        "LABEL_2": "Positive",
+        "LABEL_1": "Neutral",
+    }
 
     def _map_label(self, label: str) -> str:
         """Map model labels to Positive/Negative/Neutral."""
-        if label in ["NEGATIVE", "LABEL_0"]:
-            return "Negative"
-        elif label in ["POSITIVE", "LABEL_2", "LABEL_1"]:
-            # Note: LABEL_1 could be neutral in some models, adjust if needed
-            if label == "LABEL_1":
-                return "Neutral"
-            return "Positive"
-        else:
-            return "Neutral"
-
-    def _extract_link(self, item: dict) -> str:
-        """Extract article link from yfinance news item."""
-        content = item.get("content", {})
-        link_data = content.get("clickThroughUrl") or content.get("canonicalUrl")
-
-        if isinstance(link_data, dict):
-            return link_data.get("url", "#")
-        return link_data or "#"
+        return self._LABEL_MAP.get(label, "Neutral")
+
+    @staticmethod
+    def _fetch_news(ticker: str, max_articles: int) -> List[dict]:
+        """Blocking yfinance news lookup (run in the I/O pool)."""
+        return (yf.Ticker(ticker).news or [])[:max_articles]
 
     async def fetch_and_analyze(
         self, ticker: str, max_articles: int = 20
@@ -70,41 +131,70 @@ class ArticleService:
         Returns:
             Dict with overall_sentiment, articles list, and counts
         """
-        self.load_model()
+        # Model load and inference are blocking; keep them off the event loop
+        await asyncio.to_thread(self.load_model)
 
         results: List[Dict] = []
-        sentiment_counts = {"Positive": 0, "Negative": 0, "Neutral": 0}
+        sentiment_counts = dict.fromkeys(SENTIMENTS, 0)
 
         try:
-            stock = yf.Ticker(ticker.upper())
-            news = stock.news[:max_articles] if stock.news else []
-
-            for item in news:
-                content = item.get("content", {})
-                headline = content.get("title", "")
-
-                if not headline:
-                    continue
-
-                # Run sentiment classifier
+            loop = asyncio.get_running_loop()
+            news = await loop.run_in_executor(
+                io_executor, self._fetch_news, ticker.upper(), max_articles
+            )
+
+            contents = [
+                content
+                for content in (item.get("content") or {} for item in news)
+                if content.get("title")
+            ]
+            headlines = [content["title"] for content in contents]
+
+            # Classify all headlines in one batched forward pass
+            predictions = []
+            if headlines:
                 try:
-                    result = self.classifier(headline[:512])[0]
-                    sentiment = self._map_label(result["label"])
+                    predictions = await asyncio.to_thread(
+                        self.classifier,
+                        headlines,
+                        batch_size=min(32, len(headlines)),
+                        truncation=True,
+                        max_length=512,
+                    )
                 except Exception as e:
                     print(f"[ArticleService] Classification error: {e}")
-                    sentiment = "Neutral"
 
-                sentiment_counts[sentiment] += 1
+            # Unclassified headlines (batch failure) default to Neutral / 0.0
+            neutral = {"label": "NEUTRAL", "score": 0.0}
+            for i, (content, headline) in enumerate(zip(contents, headlines)):
+                result = predictions[i] if i < len(predictions) else neutral
+                sentiment = self._map_label(result["label"])
+                score = float(result.get("score", 0.0))
+
+                link_data = content.get("clickThroughUrl") or content.get("canonicalUrl")
+                if isinstance(link_data, dict):
+                    link = link_data.get("url", "#")
+                else:
+                    link = link_data or "#"
 
                 results.append(
                     {
                         "title": headline,
-                        "link": self._extract_link(item),
+                        "link": link,
                         "sentiment": sentiment,
-                        "score": result.get("score", 0) if "result" in dir() else 0,
+                        "score": score,
                     }
                 )
 
+            # Tally all labels in one pass
+            codes = np.fromiter(
+                (SENTIMENT_INDEX[r["sentiment"]] for r in results),
+                dtype=np.intp,
+                count=len(results),
+            )
+            counts = np.bincount(codes, minlength=len(SENTIMENTS))
+            sentiment_counts = dict(zip(SENTIMENTS, counts.tolist()))
+
             # Determine overall sentiment
             if sentiment_counts["Positive"] > sentiment_counts["Negative"]:
                 overall = "Bullish"
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional
+
+# Receives each text delta of a streamed sub-agent completion
+TokenCallback = Callable[[str], None]
 
 
 class BaseAgent(ABC):
@@ -18,3 +21,34 @@ class BaseAgent(ABC):
         Returns a dictionary containing the analysis and raw data.
         """
         pass
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        on_token: Optional[TokenCallback] = None,
+        **kwargs,
+    ) -> str:
+        """
+        Run a chat completion and return its text. With `on_token`, the
+        completion is streamed and every delta is passed to it as it arrives.
+        """
+        if on_token is None:
+            response = await self.client.chat.completions.create(
+                model=self.model, messages=messages, **kwargs
+            )
+            return response.choices[0].message.content
+
+        stream = await self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=True, **kwargs
+        )
+        parts = []
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    delta = chunk.choices[0].delta.content
+                    parts.append(delta)
+                    on_token(delta)
+        finally:
+            # Release the HTTP connection if the step is cancelled
+            await stream.close()
+        return "".join(parts)
@@ -1,45 +1,134 @@
+import asyncio
+import warnings
+from datetime import datetime, timedelta
+
 import httpx
+import numpy as np
+import yfinance as yf
 from StockAgents.core.config import settings
+from StockAgents.core.executor import io_executor
+from StockAgents.services.tool_cache import ttl_cache
+from StockAgents.services.persistent_cache import candle_cache, market_date, session_ttl
 from typing import List, Dict
 
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2)
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Cache TTLs (seconds): quotes are near-real-time, daily candles change slowly,
+# fundamentals move slowly, analyst ratings update monthly, profiles rarely
+QUOTE_TTL = 15
+CANDLES_TTL = 5 * 60
+METRICS_TTL = 60 * 60
+RATINGS_TTL = 6 * 60 * 60
+PROFILE_TTL = 24 * 60 * 60
+
+# Shared connection pool: keep-alive avoids a TLS handshake per Finnhub call
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+HTTP_TIMEOUT = httpx.Timeout(10.0)
+
+# Max concurrent quote requests, to stay under Finnhub rate limits
+QUOTE_CONCURRENCY = 20
+
+# time_range -> (lookback days, yfinance interval, yfinance period).
+# Ranges with a lookback use start/end; the rest use the period directly.
+# 1m looks back 32 days so the baseline predates the same day last month.
+_RANGE_MAP = {
+    "1d": (None, "5m", "1d"),
+    "1w": (7, "15m", None),
+    "1m": (32, "1d", None),
+    "3m": (91, "1d", None),
+    "6m": (183, "1d", None),
+    "1y": (365, "1d", None),
+}
+_DEFAULT_RANGE = (None, "1d", "3mo")
+
+# Analyst rating buckets, their consensus weights and score labels
+_RATING_KEYS = ("strongBuy", "buy", "hold", "sell", "strongSell")
+_RATING_WEIGHTS = np.array([2, 1, 0, -1, -2], dtype=np.int64)
+_RATING_LABELS = ["STRONG BUY", "MODERATE BUY", "HOLD", "WEAK SELL", "STRONG SELL"]
+
+# Intraday ranges change every few minutes; only daily bars go to disk
+INTRADAY_RANGES = frozenset({"1d", "1w"})
+
 
 class FinnhubClient:
     def __init__(self):
         self.api_key = settings.FINNHUB_API_KEY
         self.base_url = "https://finnhub.io/api/v1"
-
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=HTTP2_AVAILABLE,
+            timeout=HTTP_TIMEOUT,
+            limits=HTTP_LIMITS,
+        )
+        self._quote_limit = asyncio.Semaphore(QUOTE_CONCURRENCY)
+        # Blocking sibling for legacy sync callers, created on first use
+        self._sync_client = None
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP clients (called on app shutdown)."""
+        await self._client.aclose()
+        if self._sync_client is not None:
+            self._sync_client.close()
+
+    @ttl_cache(key=lambda self, symbol: f"finnhub:quote:{symbol.upper()}", ttl=QUOTE_TTL)
     async def get_quote(self, symbol: str) -> Dict:
         """Get real-time quote data for a symbol."""
         if not self.api_key:
             return {"error": "No Finnhub API Key"}
 
         params = {"symbol": symbol, "token": self.api_key}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(f"{self.base_url}/quote", params=params)
-            if resp.status_code == 200:
-                return resp.json()
-            return {}
+        async with self._quote_limit:
+            resp = await self._client.get("/quote", params=params)
+        if resp.status_code == 200:
+            return resp.json()
+        return {}
 
+    @ttl_cache(key=lambda self, symbol: f"finnhub:profile:{symbol.upper()}", ttl=PROFILE_TTL)
     async def get_company_profile(self, symbol: str) -> Dict:
         """Get company profile data (name, logo, industry)."""
         if not self.api_key:
             return {}
 
         params = {"symbol": symbol, "token": self.api_key}
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(f"{self.base_url}/stock/profile2", params=params)
-                if resp.status_code == 200:
-                    return resp.json()
-            except Exception as e:
-                print(f"Error fetching profile for {symbol}: {e}")
-            return {}
+        try:
+            resp = await self._client.get("/stock/profile2", params=params)
+            if resp.status_code == 200:
+                return resp.json()
+        except Exception as e:
+            print(f"Error fetching profile for {symbol}: {e}")
+        return {}
 
     def get_stock_price(self, symbol: str) -> float:
-        """Synchronous wrapper to get just the current price."""
-        import asyncio
-        quote = asyncio.run(self.get_quote(symbol))
-        return float(quote.get("c", 0))
+        """
+        Synchronous wrapper to get just the current price.
+        Deprecated: use `await get_quote(symbol)` from async code.
+        """
+        warnings.warn(
+            "get_stock_price is deprecated; use await get_quote(symbol)",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        if not self.api_key:
+            return 0.0
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(
+                base_url=self.base_url, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS
+            )
+        try:
+            resp = self._sync_client.get(
+                "/quote", params={"symbol": symbol, "token": self.api_key}
+            )
+        except httpx.HTTPError as e:
+            print(f"Error fetching quote for {symbol}: {e}")
+            return 0.0
+        if resp.status_code != 200:
+            return 0.0
+        return float(resp.json().get("c", 0))
 
     async def filter_market_movers(
         self, symbols: List[str], min_change_percent: float = 0
@@ -48,9 +137,15 @@ class FinnhubClient:
         Filter a list of symbols to find those exceeding a certain % change.
         Useful for 'Show me gainers in my portfolio'.
         """
+        quotes = await asyncio.gather(
+            *(self.get_quote(sym) for sym in symbols), return_exceptions=True
+        )
+
         results = []
-        for sym in symbols:
-            quote = await self.get_quote(sym)
+        for sym, quote in zip(symbols, quotes):
+            if isinstance(quote, Exception):
+                print(f"Error fetching quote for {sym}: {quote}")
+                continue
             # Finnhub Quote: c=Current, d=Change, dp=Percent Change, h=High, l=Low, o=Open, pc=Previous Close
             if quote and "dp" in quote:
                 if quote["dp"] >= min_change_percent:
@@ -63,6 +158,12 @@ class FinnhubClient:
                     )
         return sorted(results, key=lambda x: x["change_percent"], reverse=True)
 
+    @ttl_cache(
+        key=lambda self, symbol, resolution="D", time_range="3m": (
+            f"yahoo:candles:{symbol.upper()}:{resolution}:{time_range}"
+        ),
+        ttl=CANDLES_TTL,
+    )
     async def get_candles(
         self, symbol: str, resolution: str = "D", time_range: str = "3m"
     ) -> Dict:
@@ -70,53 +171,38 @@ class FinnhubClient:
         Fetches REAL candle data using yfinance (acting as a fallback for Finnhub free tier).
         ranges: 1d, 1w, 1m, 3m, 6m, 1y
         """
-        import yfinance as yf
-        from datetime import datetime, timedelta
-
+        persist = time_range not in INTRADAY_RANGES
+        disk_key = f"{symbol.upper()}:{resolution}:{time_range}:{market_date()}"
+        if persist:
+            cached = await candle_cache.aget(disk_key)
+            if cached is not None:
+                return cached
+
+        candles = await self._fetch_candles(symbol, time_range)
+        if persist and candles.get("s") == "ok":
+            await candle_cache.aset(disk_key, candles, session_ttl())
+        return candles
+
+    async def _fetch_candles(self, symbol: str, time_range: str) -> Dict:
+        # yfinance is blocking; run it in the I/O pool so concurrent fetches overlap
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            io_executor, self._download_candles, symbol, time_range
+        )
+
+    @staticmethod
+    def _download_candles(symbol: str, time_range: str) -> Dict:
+        """Blocking yfinance history download (run in the I/O pool)."""
         try:
             stock = yf.Ticker(symbol)
 
-            # Map range to yfinance period/interval
-            period = "3mo"
-            interval = "1d"
-
+            days, interval, period = _RANGE_MAP.get(time_range, _DEFAULT_RANGE)
             end_date = datetime.now()
-            start_date = None
-            period = None  # We will use start/end for all except default fallback
-
-            if time_range == "1d":
-                period = "1d"
-                interval = "5m"
-            elif time_range == "1w":
-                # 1 week exactly
-                start_date = end_date - timedelta(days=7)
-                interval = "15m"
-            elif time_range == "1m":
-                # 1 month (approx 30 days)
-                # Note: We need to be careful with baseline.
-                # If today is Jan 29, 1m ago is Dec 29.
-                start_date = end_date - timedelta(days=32)
-                interval = "1d"
-            elif time_range == "3m":
-                # 3 months (approx 91 days)
-                start_date = end_date - timedelta(days=91)
-                interval = "1d"
-            elif time_range == "6m":
-                # 6 months (approx 182 days)
-                start_date = end_date - timedelta(days=183)
-                interval = "1d"
-            elif time_range == "1y":
-                # 1 year exactly
-                start_date = end_date - timedelta(days=365)
-                interval = "1d"
-
-            if start_date:
+            if days:
+                start_date = end_date - timedelta(days=days)
                 hist = stock.history(start=start_date, end=end_date, interval=interval)
-            elif period:
-                hist = stock.history(period=period, interval=interval)
             else:
-                # Fallback default
-                hist = stock.history(period="3mo", interval="1d")
+                hist = stock.history(period=period, interval=interval)
 
             if hist.empty:
                 return {"s": "no_data"}
@@ -124,13 +210,11 @@ class FinnhubClient:
             # Convert to Finnhub format
             # c: Close, o: Open, h: High, l: Low, t: Timestamp
 
-            c = hist["Close"].tolist()
-            o = hist["Open"].tolist()
-            h = hist["High"].tolist()
-            lows = hist["Low"].tolist()
-            # Convert pandas timestamps to unix integers
-            t = [int(ts.timestamp()) for ts in hist.index]
-            dates = [ts.strftime("%Y-%m-%d") for ts in hist.index]
+            ohlc = hist[["Close", "Open", "High", "Low"]].to_numpy(dtype=np.float64)
+            c, o, h, lows = ohlc.T.tolist()
+            # Convert pandas timestamps to unix integers (vectorized)
+            t = hist.index.as_unit("s").asi8.tolist()
+            dates = hist.index.strftime("%Y-%m-%d").tolist()
 
             return {
                 "c": c,
@@ -145,6 +229,7 @@ class FinnhubClient:
             print(f"Error fetching real candles for {symbol}: {e}")
             return {"s": "error", "error": str(e)}
 
+    @ttl_cache(key=lambda self, symbol: f"finnhub:metrics:{symbol.upper()}", ttl=METRICS_TTL)
     async def get_company_metrics(self, symbol: str) -> Dict:
         """
         Fetches company basic financials from Finnhub.
@@ -154,106 +239,93 @@ class FinnhubClient:
             return {"error": "No Finnhub API Key"}
 
         params = {"symbol": symbol.upper(), "metric": "all", "token": self.api_key}
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(f"{self.base_url}/stock/metric", params=params)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    metric_data = data.get("metric", {})
-                    return {
-                        "ticker": symbol.upper(),
-                        "beta": metric_data.get("beta"),
-                        "52WeekHigh": metric_data.get("52WeekHigh"),
-                        "52WeekLow": metric_data.get("52WeekLow"),
-                        "peRatio": metric_data.get("peTTM"),
-                        "dividendYield": metric_data.get(
-                            "dividendYieldIndicatedAnnual"
-                        ),
-                        "source": "finnhub",
-                    }
-            except Exception as e:
-                return {"error": f"Finnhub metrics error: {str(e)}"}
+        try:
+            resp = await self._client.get("/stock/metric", params=params)
+            if resp.status_code == 200:
+                data = resp.json()
+                metric_data = data.get("metric", {})
+                return {
+                    "ticker": symbol.upper(),
+                    "beta": metric_data.get("beta"),
+                    "52WeekHigh": metric_data.get("52WeekHigh"),
+                    "52WeekLow": metric_data.get("52WeekLow"),
+                    "peRatio": metric_data.get("peTTM"),
+                    "dividendYield": metric_data.get(
+                        "dividendYieldIndicatedAnnual"
+                    ),
+                    "source": "finnhub",
+                }
+        except Exception as e:
+            return {"error": f"Finnhub metrics error: {str(e)}"}
         return {}
 
+    @ttl_cache(key=lambda self, symbol: f"finnhub:ratings:{symbol.upper()}", ttl=RATINGS_TTL)
     async def get_analyst_ratings(self, symbol: str) -> Dict:
         """
         Fetches Wall Street analyst recommendations from Finnhub.
-        Returns: {buy, sell, hold, strongBuy, strongSell, consensusScore, recommendation}
+        Returns: {buy, sell, hold, strongBuy, strongSell, consensusScore, recommendation,
+        consensusTrend} where consensusTrend scores each month Finnhub returned.
         """
         if not self.api_key:
             return {"error": "No Finnhub API Key"}
 
         params = {"symbol": symbol.upper(), "token": self.api_key}
-        async with httpx.AsyncClient() as client:
-            try:
-                resp = await client.get(
-                    f"{self.base_url}/stock/recommendation", params=params
-                )
-                if resp.status_code == 200:
-                    recs = resp.json()
-
-                    if not recs or len(recs) == 0:
-                        return {
-                            "error": "No analyst ratings found",
-                            "ticker": symbol.upper(),
-                        }
-
-                    # Get latest month's data
-                    latest = recs[0]
-
-                    strong_buy = latest.get("strongBuy", 0)
-                    buy = latest.get("buy", 0)
-                    hold = latest.get("hold", 0)
-                    sell = latest.get("sell", 0)
-                    strong_sell = latest.get("strongSell", 0)
-
-                    total = strong_buy + buy + hold + sell + strong_sell
-
-                    if total == 0:
-                        return {
-                            "error": "No analyst ratings available",
-                            "ticker": symbol.upper(),
-                        }
+        try:
+            resp = await self._client.get("/stock/recommendation", params=params)
+            if resp.status_code == 200:
+                recs = resp.json()
 
-                    # Calculate weighted consensus (-2 to +2 scale)
-                    weighted = (
-                        strong_buy * 2
-                        + buy * 1
-                        + hold * 0
-                        + sell * -1
-                        + strong_sell * -2
-                    ) / total
-
-                    # Normalize to 0-100 scale
-                    consensus_score = int((weighted + 2) * 25)
-
-                    # Determine recommendation
-                    if consensus_score > 72:
-                        recommendation = "STRONG BUY"
-                    elif consensus_score >= 65:
-                        recommendation = "MODERATE BUY"
-                    elif consensus_score >= 50:
-                        recommendation = "HOLD"
-                    elif consensus_score >= 40:
-                        recommendation = "WEAK SELL"
-                    else:
-                        recommendation = "STRONG SELL"
+                if not recs or len(recs) == 0:
+                    return {
+                        "error": "No analyst ratings found",
+                        "ticker": symbol.upper(),
+                    }
 
+                # Score every month in one pass (newest first)
+                counts = np.array(
+                    [[rec.get(k, 0) for k in _RATING_KEYS] for rec in recs],
+                    dtype=np.int64,
+                )
+                totals = counts.sum(axis=1)
+                if totals[0] == 0:
                     return {
+                        "error": "No analyst ratings available",
                         "ticker": symbol.upper(),
-                        "strongBuy": strong_buy,
-                        "buy": buy,
-                        "hold": hold,
-                        "sell": sell,
-                        "strongSell": strong_sell,
-                        "totalAnalysts": total,
-                        "consensusScore": consensus_score,
-                        "recommendation": recommendation,
-                        "period": latest.get("period"),
-                        "source": "finnhub_analysts",
                     }
-            except Exception as e:
-                return {"error": f"Finnhub analyst ratings error: {str(e)}"}
+
+                # Weighted consensus (-2 to +2 scale), normalized to 0-100
+                weighted = (counts @ _RATING_WEIGHTS) / np.where(totals > 0, totals, 1)
+                scores = ((weighted + 2) * 25).astype(np.int64)
+                labels = np.select(
+                    [scores > 72, scores >= 65, scores >= 50, scores >= 40],
+                    _RATING_LABELS[:-1],
+                    default=_RATING_LABELS[-1],
+                )
+
+                latest = recs[0]
+                strong_buy, buy, hold, sell, strong_sell = counts[0].tolist()
+                trend = [
+                    {"period": rec.get("period"), "consensusScore": score}
+                    for rec, score, total in zip(recs, scores.tolist(), totals.tolist())
+                    if total
+                ]
+
+                return {
+                    "ticker": symbol.upper(),
+                    "strongBuy": strong_buy,
+                    "buy": buy,
+                    "hold": hold,
+                    "sell": sell,
+                    "strongSell": strong_sell,
+                    "totalAnalysts": int(totals[0]),
+                    "consensusScore": int(scores[0]),
+                    "recommendation": str(labels[0]),
+                    "period": latest.get("period"),
+                    "consensusTrend": trend,
+                    "source": "finnhub_analysts",
+                }
+        except Exception as e:
+            return {"error": f"Finnhub analyst ratings error: {str(e)}"}
         return {}
 
 
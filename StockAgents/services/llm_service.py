@@ -1,22 +1,50 @@
+import httpx
 from openai import AsyncOpenAI
 from StockAgents.core.config import settings
+from StockAgents.core.llm_cache import LLMCache
+from StockAgents.core.serialization import dumps, trim_lists
+from StockAgents.core.tickers import find_explicit_tickers, validate_ticker
 import json
 from StockAgents.core.prompts import (
     LLM_ANALYSIS_PROMPT,
     DATA_EXTRACTION_PROMPT,
-    TICKER_RESOLVER_PROMPT,
-    TICKER_EXTRACTOR_PROMPT,
+    TICKER_INFO_PROMPT,
 )
 
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2)
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Max number of queries whose extraction results are memoized. Entries are
+# a few small dicts, so a few thousand cost well under a megabyte.
+LLM_CACHE_SIZE = 4096
+
+# One pooled client for every agent: planner, synthesis and sub-agent calls
+# reuse warm connections instead of paying a TLS handshake each
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=200)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
 
 class LLMService:
     def __init__(self):
         # Initialize Gemini client via OpenAI SDK
+        self._http = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+        )
         self.client = AsyncOpenAI(
             base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
             api_key=settings.GOOGLE_API_KEY,
+            http_client=self._http,
         )
         self.model = "gemini-2.5-flash"  # High performance model
+        self._cache = LLMCache(maxsize=LLM_CACHE_SIZE)
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client (called on app shutdown)."""
+        await self._http.aclose()
 
     async def analyze_context(self, query: str, context_data: dict) -> str:
         """
@@ -27,7 +55,7 @@ class LLMService:
         system_prompt = LLM_ANALYSIS_PROMPT
 
         # Prepare the context (limit size if needed)
-        context_str = json.dumps(context_data, indent=2)
+        context_str = dumps(trim_lists(context_data))
         if len(context_str) > 10000:
             context_str = context_str[:10000] + "...(truncated)"
 
@@ -57,47 +85,77 @@ class LLMService:
         Uses LLM to extract structured JSON data from a natural language query.
         Target: Extract stock holdings like {"AAPL": 5000, "TSLA": 2000}.
         """
-        system_prompt = DATA_EXTRACTION_PROMPT
-
         try:
-            completion = await self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query},
-                ],
-                model=self.model,
-                temperature=0.0,  # Deterministic for extraction
-                response_format={"type": "json_object"},
+            data = await self._cache.get_or_compute(
+                "holdings", query, lambda: self._fetch_structured_data(query)
             )
-            content = completion.choices[0].message.content
-            return json.loads(content)
+            return dict(data)
         except Exception as e:
             print(f"LLM Extraction Error: {e}")
             return {}
 
+    async def _fetch_structured_data(self, query: str) -> dict:
+        completion = await self.client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": DATA_EXTRACTION_PROMPT},
+                {"role": "user", "content": query},
+            ],
+            model=self.model,
+            temperature=0.0,  # Deterministic for extraction
+            response_format={"type": "json_object"},
+        )
+        return json.loads(completion.choices[0].message.content)
+
+    async def _fetch_ticker_info(self, query: str) -> dict:
+        completion = await self.client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": TICKER_INFO_PROMPT},
+                {"role": "user", "content": query},
+            ],
+            model=self.model,
+            temperature=0.0,
+            response_format={"type": "json_object"},
+        )
+        data = json.loads(completion.choices[0].message.content)
+
+        tickers = data.get("all", []) if isinstance(data, dict) else data
+        if not isinstance(tickers, list):
+            tickers = []
+        tickers = [t for t in (validate_ticker(str(x)) for x in tickers if x) if t]
+
+        primary = data.get("primary") if isinstance(data, dict) else None
+        primary = validate_ticker(str(primary)) if primary else None
+        if not primary:
+            primary = tickers[0] if tickers else None
+
+        return {"primary": primary, "all": tickers}
+
+    async def extract_ticker_info(self, query: str) -> dict:
+        """
+        Resolves both the primary ticker and the full ticker list in one LLM call.
+        Example: "Compare Apple and NVDA" -> {"primary": "AAPL", "all": ["AAPL", "NVDA"]}
+
+        Results are memoized per normalized query, and concurrent callers with
+        the same query share a single in-flight request.
+        """
+        # Fast path: tickers typed explicitly need no LLM round trip
+        explicit = find_explicit_tickers(query)
+        if explicit:
+            return {"primary": explicit[0], "all": explicit}
+
+        return await self._cache.get_or_compute(
+            "tickers", query, lambda: self._fetch_ticker_info(query)
+        )
+
     async def resolve_ticker(self, query: str) -> str:
         """
         Extracts the primary stock ticker from a query, resolving company names if needed.
         Example: "Analyze Apple" -> "AAPL". "Stock for Tesla" -> "TSLA".
         Returns just the ticker string, or None.
         """
-        system_prompt = TICKER_RESOLVER_PROMPT
-
         try:
-            completion = await self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query},
-                ],
-                model=self.model,
-                temperature=0.0,
-                max_tokens=10,
-            )
-            content = completion.choices[0].message.content.strip()
-            # Basic validation
-            if content.isalpha() and len(content) <= 5:
-                return content.upper()
-            return None
+            info = await self.extract_ticker_info(query)
+            return info["primary"]
         except Exception:
             return None
 
@@ -106,34 +164,9 @@ class LLMService:
         Extracts ALL stock tickers mentioned in a query, resolving company names.
         Example: "Compare Apple, Meta and NVDA" -> ["AAPL", "META", "NVDA"]
         """
-        system_prompt = TICKER_EXTRACTOR_PROMPT
-
         try:
-            completion = await self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query},
-                ],
-                model=self.model,
-                temperature=0.0,
-                response_format={"type": "json_object"},
-            )
-            content = completion.choices[0].message.content
-            # Expecting {"tickers": [...]} or just a list if possible?
-            # OpenAI JSON mode ensures valid JSON. Let's ask for specific key in prompt or parse list directly.
-            # Actually, standard JSON object requirement means we should ask for a key.
-            # Let's refine prompt above slightly in next step or just handle parsing.
-            # Wait, I can't refine prompt in "ReplacementContent" easily if I don't change the execution logic.
-            # I'll rely on parsing.
-            data = json.loads(content)
-            if isinstance(data, list):
-                return data
-            if isinstance(data, dict):
-                # Search values for a list
-                for val in data.values():
-                    if isinstance(val, list):
-                        return [str(x).upper() for x in val]
-            return []
+            info = await self.extract_ticker_info(query)
+            return list(info["all"])
         except Exception as e:
             print(f"LLM Ticker Extraction Error: {e}")
             return []
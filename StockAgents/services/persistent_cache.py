@@ -0,0 +1,157 @@
+"""
+Persistent Cache - SQLite-backed key/value store that survives restarts.
+
+Sits beneath the in-memory TTL cache for data that is stable within a trading
+session (daily candles), so repeat tickers skip the network across processes.
+Values are stored as compact JSON; entries expire after a per-entry TTL.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, time as dt_time
+from typing import Any, Optional
+from zoneinfo import ZoneInfo
+
+from StockAgents.core.config import settings
+from StockAgents.core.executor import io_executor
+from StockAgents.core.serialization import dumps, loads
+
+# Daily bars are final once the session closes; refresh intraday
+SESSION_TTL = 15 * 60
+OFF_HOURS_TTL = 24 * 60 * 60
+
+# Keys are dated, so old rows are never overwritten; sweep them periodically
+PURGE_INTERVAL = 6 * 60 * 60
+
+_MARKET_TZ = ZoneInfo("America/New_York")
+_MARKET_OPEN = dt_time(9, 30)
+_MARKET_CLOSE = dt_time(16, 0)
+
+
+def market_is_open(now: Optional[datetime] = None) -> bool:
+    """True during regular US equity hours (holidays not considered)."""
+    now = (now or datetime.now(_MARKET_TZ)).astimezone(_MARKET_TZ)
+    return now.weekday() < 5 and _MARKET_OPEN <= now.time() < _MARKET_CLOSE
+
+
+def session_ttl() -> float:
+    return SESSION_TTL if market_is_open() else OFF_HOURS_TTL
+
+
+def market_date() -> str:
+    """Current trading-calendar date (YYYY-MM-DD, US/Eastern)."""
+    return datetime.now(_MARKET_TZ).strftime("%Y-%m-%d")
+
+
+class PersistentCache:
+    """
+    Small SQLite key/value cache with per-entry expiry.
+
+    The database is opened on first use; if it can't be (read-only or missing
+    cache dir), the cache disables itself and every lookup is a miss. Expired
+    rows are deleted on open and then at most every PURGE_INTERVAL on write.
+    Async callers use aget/aset, which run the SQLite I/O on the I/O pool.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._next_purge = 0.0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use (caller holds the lock)."""
+        if self._conn is None and not self._disabled:
+            try:
+                if self.path != ":memory:":
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache "
+                    "(key TEXT PRIMARY KEY, expires REAL NOT NULL, value BLOB NOT NULL)"
+                )
+                conn.commit()
+                self._conn = conn
+                self._purge(conn)
+            except (OSError, sqlite3.Error) as e:
+                print(f"[PersistentCache] Disabled, cannot open {self.path}: {e}")
+                self._disabled = True
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with self._lock:
+                conn = self._connection()
+                if conn is None:
+                    return None
+                row = conn.execute(
+                    "SELECT value FROM cache WHERE key = ? AND expires > ?",
+                    (key, time.time()),
+                ).fetchone()
+            return loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            print(f"[PersistentCache] Read failed for {key}: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            blob = dumps(value).encode()
+            with self._lock:
+                conn = self._connection()
+                if conn is None:
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, expires, value) VALUES (?, ?, ?)",
+                    (key, time.time() + ttl, blob),
+                )
+                conn.commit()
+                if time.time() >= self._next_purge:
+                    self._purge(conn)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"[PersistentCache] Write failed for {key}: {e}")
+
+    async def aget(self, key: str) -> Optional[Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(io_executor, self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: float) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(io_executor, self.set, key, value, ttl)
+
+    def _purge(self, conn: sqlite3.Connection) -> None:
+        """Delete expired rows (caller holds the lock)."""
+        now = time.time()
+        conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        conn.commit()
+        self._next_purge = now + PURGE_INTERVAL
+
+    def purge_expired(self) -> None:
+        try:
+            with self._lock:
+                conn = self._connection()
+                if conn is not None:
+                    self._purge(conn)
+        except sqlite3.Error as e:
+            print(f"[PersistentCache] Purge failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM cache")
+                conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+candle_cache = PersistentCache(os.path.join(settings.CACHE_DIR, "candles.sqlite3"))
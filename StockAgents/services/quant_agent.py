@@ -5,42 +5,56 @@ Uses Wolfram Cloud for mathematical computations and Finnhub for analyst ratings
 Persona: Dry, numerical, focused on data.
 """
 
-import json
 import asyncio
-from typing import Dict, Any
-from concurrent.futures import ThreadPoolExecutor
+import functools
+from typing import Callable, Dict, Any, List, Optional
 from StockAgents.core.prompts import QUANT_SYSTEM_PROMPT
-from .base_agent import BaseAgent
+from StockAgents.core.executor import io_executor
+from StockAgents.core.serialization import dumps
+from StockAgents.core.tickers import normalize_ticker
+from StockAgents.tools.wolfram_tool import (
+    build_risk_result,
+    wolfram_risk_analysis,
+    wolfram_risk_analysis_many,
+)
+from StockAgents.tools.yfinance_tool import (
+    get_historical_prices_async,
+    get_historical_prices_many,
+)
+from .finnhub_client import finnhub_client
+from .base_agent import BaseAgent, TokenCallback
 from .llm_service import llm_service
 
-# Thread pool for blocking Wolfram calls
-executor = ThreadPoolExecutor(max_workers=3)
+# Fewer closes than this (about a trading month) are not worth a Wolfram call
+MIN_RISK_PRICES = 20
 
 
 class QuantAgent(BaseAgent):
+    # Built once; the SDK only reads these
+    _system_message = {"role": "system", "content": QUANT_SYSTEM_PROMPT}
+    _user_template = (
+        "Analyze this risk data for {ticker}:\n\n{data}\n\n"
+        "Provide a quantitative risk assessment."
+    )
+
     def __init__(self):
         super().__init__(name="Quant", client=llm_service.client)
         self.model = "gemini-2.5-flash"
 
-    async def run(self, ticker: str) -> Dict[str, Any]:
+    async def _collect_risk_data(self, ticker: str) -> Dict[str, Any]:
         """
-        Execute quantitative analysis.
+        Gather price history, metrics and analyst ratings, then run the risk model.
         Logic:
         1. Always get Price History & Company Metrics (Fast).
         2. Always get Analyst Ratings (Fast).
         3. Only run Wolfram Risk model (Slow) if necessary?
            - For now, we keep it as is, but structured as a class method.
         """
-        from StockAgents.tools.wolfram_tool import wolfram_risk_analysis
-        from StockAgents.tools.yfinance_tool import get_historical_prices
-        from StockAgents.services.finnhub_client import finnhub_client
-
-        ticker = ticker.upper().strip()
         loop = asyncio.get_running_loop()
 
         # Step 1: Parallel Fetch (Metrics, Analysts, History)
         # We can run these concurrently
-        task_history = loop.run_in_executor(executor, get_historical_prices, ticker)
+        task_history = get_historical_prices_async(ticker)
         task_metrics = finnhub_client.get_company_metrics(ticker)
         task_ratings = finnhub_client.get_analyst_ratings(ticker)
 
@@ -49,30 +63,130 @@ class QuantAgent(BaseAgent):
 
         prices = history.get("prices", []) if "error" not in history else []
 
+        # Too little history for a meaningful volatility: skip the Wolfram round trip
+        if len(prices) < MIN_RISK_PRICES:
+            risk_data = build_risk_result(
+                ticker,
+                len(prices),
+                {"error": "Insufficient price data for volatility calculation"},
+                metrics,
+                analyst_ratings,
+            )
+            risk_data["status"] = "insufficient_data"
+            return risk_data
+
         # Step 2: Risk Analysis (Wolfram) - still blocking/slow
-        risk_data = await loop.run_in_executor(
-            executor, wolfram_risk_analysis, ticker, prices, metrics, analyst_ratings
+        return await loop.run_in_executor(
+            io_executor, wolfram_risk_analysis, ticker, prices, metrics, analyst_ratings
         )
 
-        # Step 3: Synthesis
-        messages = [
-            {"role": "system", "content": QUANT_SYSTEM_PROMPT},
+    def _build_messages(self, ticker: str, risk_data: Dict[str, Any]) -> List[Dict]:
+        return [
+            self._system_message,
             {
                 "role": "user",
-                "content": f"Analyze this risk data for {ticker}:\n\n{json.dumps(risk_data, indent=2)}\n\nProvide a quantitative risk assessment.",
+                "content": self._user_template.format(ticker=ticker, data=dumps(risk_data)),
             },
         ]
 
+    async def _collect_risk_data_many(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        _collect_risk_data for several tickers: one chunked history download
+        and one Wolfram batch instead of a round trip per ticker.
+        """
+        loop = asyncio.get_running_loop()
+
+        # Histories land in the tool cache, where the batch risk run reuses them
+        task_history = loop.run_in_executor(io_executor, get_historical_prices_many, tickers)
+        task_metrics = asyncio.gather(
+            *(finnhub_client.get_company_metrics(t) for t in tickers), return_exceptions=True
+        )
+        task_ratings = asyncio.gather(
+            *(finnhub_client.get_analyst_ratings(t) for t in tickers), return_exceptions=True
+        )
+        _, metrics, ratings = await asyncio.gather(task_history, task_metrics, task_ratings)
+
+        risk_by_ticker = await loop.run_in_executor(
+            io_executor,
+            functools.partial(
+                wolfram_risk_analysis_many,
+                tickers,
+                metrics={t: m for t, m in zip(tickers, metrics) if isinstance(m, dict)},
+                analyst_ratings={t: r for t, r in zip(tickers, ratings) if isinstance(r, dict)},
+                min_prices=MIN_RISK_PRICES,
+            ),
+        )
+        for risk_data in risk_by_ticker.values():
+            if 0 <= risk_data.get("dataPoints", -1) < MIN_RISK_PRICES:
+                risk_data["status"] = "insufficient_data"
+        return risk_by_ticker
+
+    async def _analyze(
+        self,
+        ticker: str,
+        risk_data: Dict[str, Any],
+        on_token: Optional[TokenCallback] = None,
+    ) -> Dict[str, Any]:
+        """LLM synthesis over collected risk data."""
+        messages = self._build_messages(ticker, risk_data)
+
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model, messages=messages, temperature=0.3, max_tokens=400
+            analysis = await self.complete(
+                messages, on_token, temperature=0.3, max_tokens=400
             )
-            analysis = response.choices[0].message.content
         except Exception as e:
             analysis = f"Quant analysis error: {str(e)}"
 
         return {"analysis": analysis, "risk_data": risk_data, "source": "quant_agent"}
 
+    async def run(
+        self, ticker: str, on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute quantitative analysis.
+        If `on_token` is given, the assessment is streamed to it as it is written.
+        """
+        ticker = normalize_ticker(ticker)
+        risk_data = await self._collect_risk_data(ticker)
+
+        # Step 3: Synthesis
+        return await self._analyze(ticker, risk_data, on_token)
+
+    async def run_many(
+        self,
+        tickers: List[str],
+        on_token: Optional[Callable[[str, str], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several tickers: risk data is collected in one batch, then the
+        per-ticker syntheses run concurrently. Results are in input order; a
+        failing ticker yields an error entry instead of failing the batch.
+        If `on_token` is given, it receives (ticker, delta) as each assessment
+        is written.
+        """
+        symbols = [normalize_ticker(t) for t in tickers]
+        distinct = list(dict.fromkeys(symbols))
+        risk_by_ticker = await self._collect_risk_data_many(distinct)
+
+        results = await asyncio.gather(
+            *(
+                self._analyze(
+                    t,
+                    risk_by_ticker[t],
+                    functools.partial(on_token, t) if on_token else None,
+                )
+                for t in distinct
+            ),
+            return_exceptions=True,
+        )
+        by_ticker = {
+            t: {"analysis": f"Quant analysis error: {r}", "risk_data": {}, "source": "quant_agent"}
+            if isinstance(r, Exception)
+            else r
+            for t, r in zip(distinct, results)
+        }
+        return [by_ticker[t] for t in symbols]
+
 
 # Singleton instance
 quant_agent = QuantAgent()
@@ -7,44 +7,35 @@ Persona: Insightful, contextual, news-focused.
 PRIVACY: Only market-related queries are passed to Tavily.
 """
 
-import json
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from StockAgents.core.prompts import RESEARCHER_SYSTEM_PROMPT
-from .base_agent import BaseAgent
+from StockAgents.core.serialization import dumps
+from StockAgents.tools.tavily_tool import tavily_market_search_async
+from .base_agent import BaseAgent, TokenCallback
 from .llm_service import llm_service
 
-# Thread pool for blocking Tavily calls
-executor = ThreadPoolExecutor(max_workers=3)
-
 
 class ResearcherAgent(BaseAgent):
+    # Built once; the SDK only reads these
+    _system_message = {"role": "system", "content": RESEARCHER_SYSTEM_PROMPT}
+    _user_template = (
+        "User Question: {query}\n\nSearch Results:\n{data}\n\n"
+        "Provide a detailed market intelligence report."
+    )
+
     def __init__(self):
         super().__init__(name="Researcher", client=llm_service.client)
         self.model = "gemini-2.5-flash"
 
-    async def run(self, query: str) -> Dict[str, Any]:
-        """
-        Execute the iterative research process.
-        Input: "Why is Apple down?"
-        Internal Loop: Plan -> Search -> Analyze -> Refine -> Answer
-        """
+    async def _search(self, query: str) -> Dict[str, Any]:
         # Step 1: Initial Search (Deep Context)
-        from StockAgents.tools.tavily_tool import tavily_market_search
-
-        loop = asyncio.get_running_loop()
-
         # We perform a robust search first
         # In a more advanced version, we would let the LLM decide the search query
         # For now, we trust the Planner's query is specific enough.
 
         # Thought: "I need to find news explaining the user's query"
-        search_results = await loop.run_in_executor(
-            executor, tavily_market_search, query
-        )
+        search_results = await tavily_market_search_async(query)
 
-        # Step 2: Synthesis
         # Check if results are empty
         if (
             not search_results
@@ -54,19 +45,37 @@ class ResearcherAgent(BaseAgent):
             # Fallback: Try a broader search if specific fail
             pass
 
-        messages = [
-            {"role": "system", "content": RESEARCHER_SYSTEM_PROMPT},
+        return search_results
+
+    def _build_messages(
+        self, query: str, search_results: Dict[str, Any]
+    ) -> List[Dict]:
+        return [
+            self._system_message,
             {
                 "role": "user",
-                "content": f"User Question: {query}\n\nSearch Results:\n{json.dumps(search_results, indent=2)}\n\nProvide a detailed market intelligence report.",
+                "content": self._user_template.format(query=query, data=dumps(search_results)),
             },
         ]
 
+    async def run(
+        self, query: str, on_token: Optional[TokenCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute the iterative research process.
+        Input: "Why is Apple down?"
+        Internal Loop: Plan -> Search -> Analyze -> Refine -> Answer
+        If `on_token` is given, the report is streamed to it as it is written.
+        """
+        search_results = await self._search(query)
+
+        # Step 2: Synthesis
+        messages = self._build_messages(query, search_results)
+
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model, messages=messages, temperature=0.5, max_tokens=600
+            analysis = await self.complete(
+                messages, on_token, temperature=0.5, max_tokens=600
             )
-            analysis = response.choices[0].message.content
         except Exception as e:
             analysis = f"Research analysis error: {str(e)}"
 
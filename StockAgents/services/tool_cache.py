@@ -0,0 +1,134 @@
+"""
+Tool Cache - In-process TTL cache for third-party tool responses.
+
+Finnhub and Tavily responses are billed per call and change slowly relative
+to user traffic, so repeat lookups within a TTL are served from memory.
+Concurrent async lookups of the same key share one in-flight call.
+Error payloads are never cached.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# Print the hit rate every this many lookups
+STATS_EVERY = 500
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Sync tools are called from the I/O thread pool
+        self._lock = threading.Lock()
+        # In-flight async calls, for single-flight dedup (event loop only)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+            lookups = self.hits + self.misses
+        if lookups % STATS_EVERY == 0:
+            print(f"[ToolCache] hit rate {self.hit_rate():.1%} over {lookups} lookups")
+        return (False, None) if entry is None else (True, entry[1])
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+tool_cache = TTLCache(maxsize=1024)
+
+
+def _is_cacheable(value: Any) -> bool:
+    if not value:
+        return False
+    if isinstance(value, dict) and "error" in value:
+        return False
+    return True
+
+
+def _finish_inflight(cache: TTLCache, cache_key: Hashable, ttl: float, task: asyncio.Task) -> None:
+    if cache._inflight.get(cache_key) is task:
+        del cache._inflight[cache_key]
+    # exception() also marks a failure as retrieved when every caller left
+    if task.cancelled() or task.exception() is not None:
+        return
+    value = task.result()
+    if _is_cacheable(value):
+        cache.set(cache_key, value, ttl)
+
+
+def ttl_cache(key: Callable[..., Hashable], ttl: float, cache: TTLCache = tool_cache):
+    """
+    Cache a tool function's result under key(*args, **kwargs) for ttl seconds.
+    Works for both async and sync functions.
+    """
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = key(*args, **kwargs)
+                hit, value = cache.get(cache_key)
+                if hit:
+                    return value
+
+                # Join an identical call already in flight on this loop. The
+                # call runs as its own task so cancelling one caller (e.g. a
+                # client disconnect) never cancels it for the others.
+                loop = asyncio.get_running_loop()
+                task = cache._inflight.get(cache_key)
+                if task is None or task.get_loop() is not loop:
+                    task = loop.create_task(fn(*args, **kwargs))
+                    cache._inflight[cache_key] = task
+                    task.add_done_callback(
+                        functools.partial(_finish_inflight, cache, cache_key, ttl)
+                    )
+                return await asyncio.shield(task)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            hit, value = cache.get(cache_key)
+            if hit:
+                return value
+            value = fn(*args, **kwargs)
+            if _is_cacheable(value):
+                cache.set(cache_key, value, ttl)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -7,12 +7,28 @@ PRIVACY BOUNDARY: This tool sends data to an external API.
 """
 
 import os
+import hashlib
+import httpx
 from dotenv import load_dotenv
+from StockAgents.services.tool_cache import ttl_cache
 
 load_dotenv()
 
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 
+# News moves faster than fundamentals; keep search results briefly
+SEARCH_TTL = 15 * 60
+
+# Per-result content limit (chars)
+SNIPPET_CHARS = 500
+
+# REST endpoint for the async path; one pooled client for all searches
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+tavily_http = httpx.AsyncClient(
+    timeout=httpx.Timeout(30.0, connect=5.0),
+    limits=httpx.Limits(max_keepalive_connections=10, max_connections=50),
+)
+
 # Initialize client
 try:
     from tavily import TavilyClient
@@ -22,6 +38,10 @@ except ImportError:
     tavily_client = None
 
 
+@ttl_cache(
+    key=lambda query: f"tavily:{hashlib.sha256(query.encode()).hexdigest()}",
+    ttl=SEARCH_TTL,
+)
 def tavily_market_search(query: str) -> dict:
     """
     Searches for market intelligence using Tavily.
@@ -41,18 +61,45 @@ def tavily_market_search(query: str) -> dict:
             query=query, search_depth="advanced", max_results=5
         )
 
-        # Extract key information
-        results = []
-        for result in response.get("results", []):
-            results.append(
-                {
-                    "title": result.get("title"),
-                    "content": result.get("content", "")[:500],  # Truncate
-                    "url": result.get("url"),
-                }
-            )
-
-        return {"query": query, "results": results, "source": "tavily"}
+        return _format_response(query, response)
+
+    except Exception as e:
+        return {"error": f"Tavily error: {str(e)}", "query": query}
+
+
+def _format_response(query: str, response: dict) -> dict:
+    """Keep the key fields of each search result, with truncated content."""
+    results = [
+        {
+            "title": r.get("title"),
+            "content": (r.get("content") or "")[:SNIPPET_CHARS],
+            "url": r.get("url"),
+        }
+        for r in response.get("results") or ()
+    ]
+    return {"query": query, "results": results, "source": "tavily"}
+
+
+@ttl_cache(
+    key=lambda query: f"tavily:{hashlib.sha256(query.encode()).hexdigest()}",
+    ttl=SEARCH_TTL,
+)
+async def tavily_market_search_async(query: str) -> dict:
+    """
+    Async tavily_market_search over the REST API; no thread pool hop.
+    Shares the sync version's cache entries.
+    """
+    if not TAVILY_API_KEY:
+        return {"error": "Tavily client not configured", "query": query}
+
+    try:
+        resp = await tavily_http.post(
+            TAVILY_SEARCH_URL,
+            headers={"Authorization": f"Bearer {TAVILY_API_KEY}"},
+            json={"query": query, "search_depth": "advanced", "max_results": 5},
+        )
+        resp.raise_for_status()
+        return _format_response(query, resp.json())
 
     except Exception as e:
         return {"error": f"Tavily error: {str(e)}", "query": query}
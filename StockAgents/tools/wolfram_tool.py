@@ -9,13 +9,35 @@ Architecture:
 This separates data sources from compute engine.
 """
 
+import atexit
 import re
 import math
 import os
+import queue
+import threading
+
+import numpy as np
 from dotenv import load_dotenv
+from StockAgents.core.tickers import normalize_ticker
+from StockAgents.tools.yfinance_tool import get_historical_prices, get_historical_prices_many
 
 load_dotenv()
 
+# Trading days per year, used to annualize daily volatility
+TRADING_DAYS = 252
+_SQRT_TRADING_DAYS = math.sqrt(TRADING_DAYS)
+
+# \Z rather than $, which would also accept a trailing newline
+_TICKER_RE = re.compile(r"^[A-Z]{1,5}\Z")
+
+# Optional: numba compiles a single-pass (Welford) variance kernel
+try:
+    import numba
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Config
 WOLFRAM_KEY_ID = os.getenv("WOLFRAM_KEY_ID")
 WOLFRAM_KEY_SECRET = os.getenv("WOLFRAM_KEY_SECRET")
@@ -23,13 +45,80 @@ WOLFRAM_KEY_SECRET = os.getenv("WOLFRAM_KEY_SECRET")
 # Try importing Wolfram client
 try:
     from wolframclient.evaluation import WolframCloudSession, SecuredAuthenticationKey
-    from wolframclient.language import wlexpr
+    from wolframclient.language import wl, wlexpr
 
     WOLFRAM_AVAILABLE = True
 except ImportError:
     WOLFRAM_AVAILABLE = False
 
 
+# Authenticated cloud sessions are started on first use and reused. Each
+# session serves one call at a time (the client is not documented as
+# thread-safe), so a small pool lets concurrent requests evaluate in parallel.
+WOLFRAM_SESSIONS = 4
+
+_idle_sessions: "queue.LifoQueue" = queue.LifoQueue()
+_session_slots = threading.BoundedSemaphore(WOLFRAM_SESSIONS)
+
+
+def _terminate(session) -> None:
+    try:
+        session.terminate()
+    except Exception:
+        pass
+
+
+def _terminate_sessions() -> None:
+    while True:
+        try:
+            _terminate(_idle_sessions.get_nowait())
+        except queue.Empty:
+            return
+
+
+def _evaluate(expr):
+    """Evaluate on a pooled session; a failed call drops it for a fresh start."""
+    with _session_slots:
+        try:
+            session = _idle_sessions.get_nowait()
+        except queue.Empty:
+            sak = SecuredAuthenticationKey(WOLFRAM_KEY_ID, WOLFRAM_KEY_SECRET)
+            session = WolframCloudSession(credentials=sak)
+            session.start()
+        try:
+            result = session.evaluate(expr)
+        except Exception:
+            _terminate(session)
+            raise
+        _idle_sessions.put(session)
+        return result
+
+
+atexit.register(_terminate_sessions)
+
+
+# Per-series volatility as a Wolfram pure function of the price list
+_VOLATILITY_FN = """
+Function[{prices}, Module[{returns, dailyVol},
+    (* Calculate log returns *)
+    returns = Differences[Log[prices]];
+
+    (* Daily volatility (standard deviation of returns) *)
+    dailyVol = StandardDeviation[returns];
+
+    <|
+        "dailyVolatility" -> dailyVol,
+        (* Annualized volatility (multiply by sqrt of trading days) *)
+        "annualizedVolatility" -> dailyVol * Sqrt[252],
+        (* Trend: UP if last price > first price *)
+        "trend" -> If[Last[prices] > First[prices], "UP", "DOWN"],
+        "dataPoints" -> Length[prices],
+        "source" -> "wolfram_cloud"
+    |>
+]]
+"""
+
+
 def wolfram_compute_volatility(prices: list) -> dict:
     """
     Uses Wolfram Cloud to compute volatility from price data.
@@ -39,7 +128,7 @@ def wolfram_compute_volatility(prices: list) -> dict:
 
     This is a BLOCKING call - must be run in executor.
     """
-    if not prices or len(prices) < 10:
+    if prices is None or len(prices) < 10:
         return {"error": "Insufficient price data (need at least 10 data points)"}
 
     if not WOLFRAM_AVAILABLE or not WOLFRAM_KEY_ID or not WOLFRAM_KEY_SECRET:
@@ -51,88 +140,125 @@ def wolfram_compute_volatility(prices: list) -> dict:
         result["warning"] = "Wolfram Cloud not configured. Using Python fallback."
         return result
 
-    session = None
     try:
-        # Connect to Wolfram Cloud
-        sak = SecuredAuthenticationKey(WOLFRAM_KEY_ID, WOLFRAM_KEY_SECRET)
-        session = WolframCloudSession(credentials=sak)
-        session.start()
-
-        # Convert prices to Wolfram list format
-        prices_str = "{" + ",".join(str(p) for p in prices) + "}"
-
-        # Wolfram code to compute volatility from provided prices
-        wolfram_code = f"""
-        Module[{{prices = {prices_str}, returns, dailyVol, annualVol, trend}},
-            (* Calculate log returns *)
-            returns = Differences[Log[prices]];
-            
-            (* Daily volatility (standard deviation of returns) *)
-            dailyVol = StandardDeviation[returns];
-            
-            (* Annualized volatility (multiply by sqrt of trading days) *)
-            annualVol = dailyVol * Sqrt[252];
-            
-            (* Trend: UP if last price > first price *)
-            trend = If[Last[prices] > First[prices], "UP", "DOWN"];
-            
-            <|
-                "dailyVolatility" -> dailyVol,
-                "annualizedVolatility" -> annualVol,
-                "trend" -> trend,
-                "dataPoints" -> Length[prices],
-                "source" -> "wolfram_cloud"
-            |>
-        ]
-        """
-
-        result = session.evaluate(wlexpr(wolfram_code))
-
-        # Safely convert result
-        if hasattr(result, "keys"):
-            return dict(result)
-        elif isinstance(result, dict):
-            return result
-        else:
-            return {"raw_result": str(result), "source": "wolfram_cloud"}
+        # Prices go in as an expression (a list of reals the client serializes
+        # to WL input at full precision), not a hand-formatted string
+        result = _evaluate(wl.Construct(wlexpr(_VOLATILITY_FN), _wl_prices(prices)))
+        return _to_dict(result)
 
     except Exception as e:
         # Fallback to Python on error
         print(f"Wolfram error, falling back to Python: {e}")
         return python_compute_volatility(prices)
 
-    finally:
-        if session:
-            try:
-                session.terminate()
-            except Exception:
-                pass
+
+def wolfram_compute_volatility_batch(prices_by_ticker: dict) -> dict:
+    """
+    Volatility for several tickers in a single Wolfram Cloud round trip.
+
+    Input: {ticker: [closing prices]}
+    Output: {ticker: wolfram_compute_volatility-shaped dict}
+
+    This is a BLOCKING call - must be run in executor.
+    """
+    results = {}
+    batch = {}
+    for ticker, prices in prices_by_ticker.items():
+        if prices is None or len(prices) < 10:
+            results[ticker] = {
+                "error": "Insufficient price data (need at least 10 data points)"
+            }
+        else:
+            batch[ticker] = prices
+
+    if not batch:
+        return results
+
+    if not WOLFRAM_AVAILABLE or not WOLFRAM_KEY_ID or not WOLFRAM_KEY_SECRET:
+        print(
+            "[WARN] Wolfram Cloud not configured. Using Python fallback for volatility calculation."
+        )
+        for ticker, prices in batch.items():
+            result = python_compute_volatility(prices)
+            result["warning"] = "Wolfram Cloud not configured. Using Python fallback."
+            results[ticker] = result
+        return results
+
+    try:
+        # <| "AAPL" -> {...}, ... |> mapped through the per-ticker function
+        assoc = {ticker: _wl_prices(prices) for ticker, prices in batch.items()}
+        batch_result = _evaluate(wl.Map(wlexpr(_VOLATILITY_FN), assoc))
+        for ticker in batch:
+            results[ticker] = _to_dict(batch_result[ticker])
+
+    except Exception as e:
+        print(f"Wolfram batch error, falling back to Python: {e}")
+        for ticker, prices in batch.items():
+            results[ticker] = python_compute_volatility(prices)
+
+    return results
+
+
+def _wl_prices(prices) -> list:
+    """Plain float list; the one list conversion at the Wolfram boundary."""
+    return np.asarray(prices, dtype=np.float64).tolist()
+
+
+def _to_dict(result) -> dict:
+    """Safely convert a Wolfram association to a plain dict."""
+    if hasattr(result, "keys"):
+        return dict(result)
+    elif isinstance(result, dict):
+        return result
+    else:
+        return {"raw_result": str(result), "source": "wolfram_cloud"}
+
+if NUMBA_AVAILABLE:
+
+    @numba.njit(cache=True)
+    def _welford_logret_var(prices):
+        """One pass over prices: (count, mean, M2) of valid log returns."""
+        n = 0
+        mean = 0.0
+        m2 = 0.0
+        for i in range(1, prices.shape[0]):
+            prev = prices[i - 1]
+            curr = prices[i]
+            if prev > 0 and curr > 0:
+                r = math.log(curr / prev)
+                n += 1
+                delta = r - mean
+                mean += delta / n
+                m2 += delta * (r - mean)
+        return n, mean, m2
 
 
 def python_compute_volatility(prices: list) -> dict:
     """
-    Pure Python fallback for volatility calculation.
+    Local (NumPy, or numba when installed) fallback for volatility calculation.
     Used when Wolfram is not available.
     """
     if len(prices) < 2:
         return {"error": "Insufficient data"}
 
-    # Calculate log returns
-    returns = []
-    for i in range(1, len(prices)):
-        if prices[i - 1] > 0 and prices[i] > 0:
-            returns.append(math.log(prices[i] / prices[i - 1]))
-
-    if not returns:
-        return {"error": "Could not calculate returns"}
+    arr = np.asarray(prices, dtype=np.float64)
 
-    # Calculate standard deviation
-    mean = sum(returns) / len(returns)
-    variance = sum((r - mean) ** 2 for r in returns) / len(returns)
-    daily_vol = math.sqrt(variance)
-    annual_vol = daily_vol * math.sqrt(252)
+    # Log returns, skipping any pair with a non-positive (or missing) price;
+    # population standard deviation
+    if NUMBA_AVAILABLE:
+        n, _, m2 = _welford_logret_var(arr)
+        if n == 0:
+            return {"error": "Could not calculate returns"}
+        daily_vol = math.sqrt(m2 / n)
+    else:
+        prev, curr = arr[:-1], arr[1:]
+        valid = (prev > 0) & (curr > 0)
+        if not valid.any():
+            return {"error": "Could not calculate returns"}
+        daily_vol = float(np.log(curr[valid] / prev[valid]).std())
+    annual_vol = daily_vol * _SQRT_TRADING_DAYS
 
-    trend = "UP" if prices[-1] > prices[0] else "DOWN"
+    trend = "UP" if arr[-1] > arr[0] else "DOWN"
 
     return {
         "dailyVolatility": round(daily_vol, 6),
@@ -151,28 +277,26 @@ def wolfram_risk_analysis(
 
     Args:
         ticker: Stock ticker symbol
-        prices: Optional list of closing prices (if not provided, fetches from yfinance)
+        prices: Optional closing prices, list or ndarray (fetched from yfinance if omitted)
         metrics: Optional company metrics dict
         analyst_ratings: Optional analyst ratings dict
 
     Returns:
         Combined risk analysis dict
     """
-    from StockAgents.tools.yfinance_tool import get_historical_prices
+    ticker = normalize_ticker(ticker)
 
-    ticker = ticker.upper().strip()
-
-    if not re.match(r"^[A-Z]{1,5}$", ticker):
+    if not _TICKER_RE.match(ticker):
         return {"error": "Invalid ticker format"}
 
     # Step 1: Get historical prices if not provided
-    if not prices:
+    if prices is None or len(prices) == 0:
         history = get_historical_prices(ticker, days=90)
         prices = history.get("prices", []) if "error" not in history else []
 
     # Step 2: Compute volatility if prices are available
     volatility_result = {}
-    if prices and len(prices) >= 10:
+    if len(prices) >= 10:
         volatility_result = wolfram_compute_volatility(prices)
     else:
         volatility_result = {
@@ -180,9 +304,76 @@ def wolfram_risk_analysis(
         }
 
     # Step 3: Combine results
+    return build_risk_result(ticker, len(prices), volatility_result, metrics, analyst_ratings)
+
+
+def wolfram_risk_analysis_many(
+    tickers: list,
+    threads: int = 10,
+    metrics: dict = None,
+    analyst_ratings: dict = None,
+    min_prices: int = 10,
+) -> dict:
+    """
+    Risk analysis (price history + volatility) for several tickers.
+    Histories come from chunked yf.download calls (`threads` workers each),
+    then all volatilities go to Wolfram in one batch.
+
+    Args:
+        tickers: Stock ticker symbols
+        threads: yf.download worker threads per chunk
+        metrics: Optional {ticker: company metrics dict}
+        analyst_ratings: Optional {ticker: analyst ratings dict}
+        min_prices: Fewest closes worth a volatility calculation
+
+    Returns:
+        {ticker: wolfram_risk_analysis-shaped dict}
+    """
+    metrics = metrics or {}
+    analyst_ratings = analyst_ratings or {}
+    results = {}
+    valid = []
+    for ticker in dict.fromkeys(normalize_ticker(t) for t in tickers):
+        if _TICKER_RE.match(ticker):
+            valid.append(ticker)
+        else:
+            results[ticker] = {"error": "Invalid ticker format"}
+
+    histories = get_historical_prices_many(valid, days=90, threads=threads)
+    prices_by_ticker = {
+        ticker: history.get("prices", []) if "error" not in history else []
+        for ticker, history in histories.items()
+    }
+
+    volatility = wolfram_compute_volatility_batch(
+        {t: p for t, p in prices_by_ticker.items() if len(p) >= max(min_prices, 10)}
+    )
+    for ticker, prices in prices_by_ticker.items():
+        volatility_result = volatility.get(ticker) or {
+            "error": "Insufficient price data for volatility calculation"
+        }
+        results[ticker] = build_risk_result(
+            ticker,
+            len(prices),
+            volatility_result,
+            metrics.get(ticker),
+            analyst_ratings.get(ticker),
+        )
+
+    return results
+
+
+def build_risk_result(
+    ticker: str,
+    data_points: int,
+    volatility_result: dict,
+    metrics: dict = None,
+    analyst_ratings: dict = None,
+) -> dict:
+    """Merge volatility, company metrics and analyst ratings into one risk dict."""
     result = {
         "ticker": ticker,
-        "dataPoints": len(prices),
+        "dataPoints": data_points,
     }
 
     # Add volatility data
@@ -221,5 +412,4 @@ def wolfram_risk_analysis(
         result["analystRecommendation"] = "N/A"
         result["totalAnalysts"] = 0
 
-
     return result
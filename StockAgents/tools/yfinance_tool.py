@@ -8,10 +8,46 @@ Used for:
 Note: Finnhub remains the PRIMARY source for real-time quotes.
 """
 
+import asyncio
+import time
+from functools import lru_cache
+
+import httpx
+import numpy as np
 import yfinance as yf
 from datetime import datetime, timedelta
 
+from StockAgents.core.executor import io_executor
+from StockAgents.core.tickers import normalize_ticker
+from StockAgents.services.persistent_cache import SESSION_TTL, market_date
+from StockAgents.services.tool_cache import tool_cache, ttl_cache
+
+# Yahoo's chart endpoint, called directly so async callers skip the thread hop
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Symbols per yf.download call; Yahoo rejects much longer multi-symbol URLs
+HISTORY_CHUNK = 20
+
+yahoo_http = httpx.AsyncClient(
+    headers=YAHOO_HEADERS,
+    timeout=httpx.Timeout(10.0),
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+)
+
+
+def _history_key(ticker: str, days: int = 90) -> str:
+    # The trading date rotates the key daily; the TTL refreshes the live bar
+    return f"yfinance:history:{normalize_ticker(ticker)}:{days}:{market_date()}"
+
+
+@lru_cache(maxsize=256)
+def _ticker(symbol: str) -> "yf.Ticker":
+    """Reuse Ticker objects; construction sets up per-symbol state."""
+    return yf.Ticker(symbol)
+
 
+@ttl_cache(key=_history_key, ttl=SESSION_TTL)
 def get_historical_prices(ticker: str, days: int = 90) -> dict:
     """
     Fetches historical daily closing prices from Yahoo Finance.
@@ -21,33 +57,145 @@ def get_historical_prices(ticker: str, days: int = 90) -> dict:
         days: Number of days of history to fetch
 
     Returns:
-        {ticker, prices: [...], dates: [...], count: int}
+        {ticker, prices: ndarray[float64], dates: ndarray[datetime64[D]], count: int}
     """
     try:
-        ticker = ticker.upper().strip()
+        ticker = normalize_ticker(ticker)
 
         # Calculate date range
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
 
         # Fetch data
-        stock = yf.Ticker(ticker)
+        stock = _ticker(ticker)
         hist = stock.history(start=start_date, end=end_date)
 
         if hist.empty:
             return {"error": "No historical data found", "ticker": ticker}
-
-        # Extract closing prices
-        close_prices = hist["Close"].tolist()
-        dates = [d.strftime("%Y-%m-%d") for d in hist.index]
-
-        return {
-            "ticker": ticker,
-            "prices": close_prices,
-            "dates": dates,
-            "count": len(close_prices),
-            "source": "yfinance",
-        }
+        return _history_from_close(ticker, hist["Close"])
 
     except Exception as e:
         return {"error": f"yfinance error: {str(e)}", "ticker": ticker}
+
+
+def _history_from_close(ticker: str, close) -> dict:
+    """Build the get_historical_prices shape from a yfinance Close series."""
+    close = close.dropna()
+    if close.empty:
+        return {"error": "No historical data found", "ticker": ticker}
+
+    # Keep columns as arrays; convert with .tolist() only at JSON boundaries
+    close_prices = close.to_numpy(dtype=np.float64, copy=False)
+    dates = close.index.tz_localize(None).to_numpy().astype("datetime64[D]")
+
+    return {
+        "ticker": ticker,
+        "prices": close_prices,
+        "dates": dates,
+        "count": len(close_prices),
+        "source": "yfinance",
+    }
+
+
+def get_historical_prices_many(tickers: list, days: int = 90, threads: int = 10) -> dict:
+    """
+    get_historical_prices for several tickers.
+
+    Cached histories are reused; the rest are fetched with one yf.download
+    per HISTORY_CHUNK symbols instead of one request per ticker.
+
+    Returns:
+        {ticker: get_historical_prices-shaped dict}
+    """
+    symbols = list(dict.fromkeys(normalize_ticker(t) for t in tickers))
+    results = {}
+    missing = []
+    for symbol in symbols:
+        hit, value = tool_cache.get(_history_key(symbol, days))
+        if hit:
+            results[symbol] = value
+        else:
+            missing.append(symbol)
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    for i in range(0, len(missing), HISTORY_CHUNK):
+        chunk = missing[i : i + HISTORY_CHUNK]
+        try:
+            frame = yf.download(
+                chunk,
+                start=start_date,
+                end=end_date,
+                group_by="ticker",
+                threads=threads,
+                progress=False,
+            )
+            error = None
+        except Exception as e:
+            frame, error = None, f"yfinance error: {str(e)}"
+
+        downloaded = set() if frame is None else set(frame.columns.get_level_values(0))
+        for symbol in chunk:
+            if symbol in downloaded:
+                history = _history_from_close(symbol, frame[symbol]["Close"])
+            else:
+                history = {"error": error or "No historical data found", "ticker": symbol}
+            if "error" not in history:
+                tool_cache.set(_history_key(symbol, days), history, SESSION_TTL)
+            results[symbol] = history
+
+    return {symbol: results[symbol] for symbol in symbols}
+
+
+def _parse_chart(ticker: str, payload: dict) -> dict:
+    """Convert a v8 chart response to the get_historical_prices shape."""
+    result = payload["chart"]["result"][0]
+    timestamps = result.get("timestamp") or []
+    indicators = result["indicators"]
+    # Match yfinance's default auto-adjusted closes when Yahoo provides them
+    adjclose = indicators.get("adjclose")
+    closes = adjclose[0]["adjclose"] if adjclose else indicators["quote"][0]["close"]
+    gmtoffset = result["meta"].get("gmtoffset", 0)
+
+    # Missing bars arrive as null; float64 conversion turns them into NaN
+    prices = np.asarray(closes, dtype=np.float64)
+    valid = ~np.isnan(prices)
+    prices = prices[valid]
+    # Shift to exchange-local time so the date matches the trading day
+    local = np.asarray(timestamps, dtype=np.int64)[valid] + gmtoffset
+    dates = local.astype("datetime64[s]").astype("datetime64[D]")
+
+    if not len(prices):
+        return {"error": "No historical data found", "ticker": ticker}
+    return {
+        "ticker": ticker,
+        "prices": prices,
+        "dates": dates,
+        "count": len(prices),
+        "source": "yahoo_chart",
+    }
+
+
+@ttl_cache(key=_history_key, ttl=SESSION_TTL)
+async def get_historical_prices_async(ticker: str, days: int = 90) -> dict:
+    """
+    Async get_historical_prices over the pooled Yahoo chart client.
+    Falls back to yfinance on the I/O pool if the endpoint fails.
+    """
+    ticker = normalize_ticker(ticker)
+    end = int(time.time())
+    params = {
+        "period1": end - days * 86400,
+        "period2": end,
+        "interval": "1d",
+        "events": "div,splits",
+        "includeAdjustedClose": "true",
+    }
+    try:
+        resp = await yahoo_http.get(YAHOO_CHART_URL.format(symbol=ticker), params=params)
+        resp.raise_for_status()
+        return _parse_chart(ticker, resp.json())
+    except (httpx.HTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+        print(f"[yfinance_tool] Chart API failed for {ticker} ({e}); using yfinance")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(io_executor, get_historical_prices, ticker, days)
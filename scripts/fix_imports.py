@@ -1,6 +1,15 @@
+import mmap
 import os
 
 ROOT_DIR = "PaperTrader/TradingAgents"
+OLD_PACKAGE = b"tradingagents"
+
+def mentions_old_package(path):
+    """Scan the raw bytes so files without the old name are never decoded."""
+    if os.path.getsize(path) == 0:
+        return False  # mmap cannot map an empty file
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm.find(OLD_PACKAGE) >= 0
 
 def fix_imports():
     count = 0
@@ -8,6 +17,8 @@ def fix_imports():
         for file in files:
             if file.endswith(".py"):
                 path = os.path.join(root, file)
+                if not mentions_old_package(path):
+                    continue
                 with open(path, "r") as f:
                     content = f.read()
                 
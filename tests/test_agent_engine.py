@@ -0,0 +1,375 @@
+import os
+import asyncio
+import pytest
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+# LLMService builds its client at import time
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from StockAgents.services.agent_engine import (
+    _PLAN_SCHEMA,
+    AgentEngine,
+    ExecutionPlan,
+    LLMPlanner,
+    PlannerStep,
+)
+
+
+def make_step(tool="get_stock_data", depends_on=None):
+    return PlannerStep(tool=tool, description=tool, depends_on=depends_on or [])
+
+
+def test_plan_schema_is_inline_with_declared_args():
+    """Structured output needs every tool argument spelled out, without $ref."""
+    step = _PLAN_SCHEMA["properties"]["steps"]["items"]
+    assert "$ref" not in str(_PLAN_SCHEMA) and "$defs" not in _PLAN_SCHEMA
+    assert set(step["properties"]["args"]["properties"]) == {
+        "ticker", "query", "sector", "min_change_percent"
+    }
+
+
+def test_plan_waves_groups_independent_steps():
+    steps = [make_step(), make_step(), make_step(depends_on=[0]), make_step(depends_on=[2, 1])]
+    assert AgentEngine._plan_waves(steps) == [[0, 1], [2], [3]]
+
+
+def test_plan_waves_ignores_forward_and_invalid_dependencies():
+    steps = [make_step(depends_on=[1]), make_step(depends_on=[7])]
+    assert AgentEngine._plan_waves(steps) == [[0, 1]]
+
+
+@pytest.mark.asyncio
+async def test_run_wave_is_concurrent_and_maps_errors():
+    engine = AgentEngine()
+    running = 0
+    peak = 0
+
+    async def execute_step(step):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if step.tool == "bad":
+            raise RuntimeError("boom")
+        return {"ok": step.tool}
+
+    results = await engine._run_wave([make_step("a"), make_step("bad"), make_step("c")], execute_step)
+
+    assert peak == 3
+    assert results[0] == {"ok": "a"}
+    assert results[1] == {"error": "Step failed: boom"}
+    assert results[2] == {"ok": "c"}
+
+
+@pytest.mark.asyncio
+async def test_step_limit_is_per_request():
+    """Concurrent requests don't share one step semaphore on the singleton engine."""
+    from StockAgents.services.agent_engine import MAX_PARALLEL_STEPS
+
+    engine = AgentEngine()
+    running = 0
+    peak = 0
+
+    async def execute_step(step):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    steps = [make_step() for _ in range(MAX_PARALLEL_STEPS + 1)]
+    await asyncio.gather(
+        engine._run_wave(steps, execute_step), engine._run_wave(steps, execute_step)
+    )
+
+    assert peak == 2 * MAX_PARALLEL_STEPS
+
+
+@pytest.mark.asyncio
+async def test_create_plan_cached_per_query_and_context():
+    """Plans are reused per normalized query + context; callers get copies."""
+    completion = MagicMock()
+    completion.choices = [MagicMock()]
+    completion.choices[0].message.content = (
+        '{"reasoning": "r", "steps": [{"tool": "get_stock_data", "args": {"ticker": "AAPL"}, "description": "d"}]}'
+    )
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=completion)
+    planner = LLMPlanner(client)
+
+    first = await planner.create_plan("Price of Apple?", {})
+    first.steps[0].args["ticker"] = "MUTATED"
+    second = await planner.create_plan("price of apple", {})
+    await planner.create_plan("price of apple", {"AAPL": 5000})
+
+    assert second.steps[0].args["ticker"] == "AAPL"
+    assert client.chat.completions.create.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_plans_share_one_call():
+    """Simultaneous identical queries coalesce onto one in-flight planner call."""
+    completion = MagicMock()
+    completion.choices = [MagicMock()]
+    completion.choices[0].message.content = '{"reasoning": "r", "steps": []}'
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.01)
+        return completion
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=slow_create)
+    planner = LLMPlanner(client)
+
+    plans = await asyncio.gather(
+        *(planner.create_plan("Should I buy NVDA?", {}) for _ in range(5))
+    )
+
+    assert all(plan.reasoning == "r" for plan in plans)
+    assert client.chat.completions.create.await_count == 1
+
+@pytest.mark.asyncio
+async def test_stock_data_prefetched_once_per_ticker():
+    """Duplicate get_stock_data steps share one fetch; malformed tickers are skipped."""
+    engine = AgentEngine()
+    plan = ExecutionPlan(
+        reasoning="r",
+        steps=[
+            PlannerStep(tool="get_stock_data", args={"ticker": "aapl"}, description="d"),
+            PlannerStep(tool="get_stock_data", args={"ticker": "AAPL"}, description="d"),
+            PlannerStep(tool="get_stock_data", args={"ticker": "MSFT"}, description="d"),
+            PlannerStep(tool="get_stock_data", args={"ticker": None}, description="d"),
+            PlannerStep(tool="get_stock_data", args={"ticker": 42}, description="d"),
+            PlannerStep(tool="get_stock_data", args={"ticker": ["TSLA"]}, description="d"),
+        ],
+    )
+    fetch = AsyncMock(return_value=({"c": 1}, {"s": "no_data"}))
+    engine._fetch_stock_data = fetch
+
+    tasks = engine._prefetch_stock_data(plan)
+    await asyncio.gather(*tasks.values())
+
+    assert sorted(tasks) == ["AAPL", "MSFT"]
+    assert fetch.await_count == 2
+
+
+class FakeStream:
+    def __init__(self, deltas):
+        self._deltas = iter(deltas)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            delta = next(self._deltas)
+        except StopIteration:
+            raise StopAsyncIteration
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = delta
+        return chunk
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_run_workflow_collects_stream():
+    """run_workflow is assembled from the same stream the UI consumes."""
+    from StockAgents.services.agent_engine import llm_service
+
+    engine = AgentEngine()
+    plan = ExecutionPlan(
+        reasoning="r", steps=[PlannerStep(tool="unknown_tool", description="d")]
+    )
+    engine.planner.create_plan = AsyncMock(return_value=plan)
+    create = AsyncMock(return_value=FakeStream(["Score: ", "70/100"]))
+
+    with patch.object(llm_service.client.chat.completions, "create", create):
+        result = await engine.run_workflow("Analyze something", {})
+
+    assert result["recommendation"] == "Score: 70/100"
+    assert result["plan"]["steps"][0]["tool"] == "unknown_tool"
+    assert result["analysis"]["results"] == {
+        "step_0_unknown_tool": {"error": "Unknown tool: unknown_tool"}
+    }
+    assert create.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_synthesis_stream_coalesces_tokens():
+    """Small deltas are merged into fewer frames without losing text."""
+    from StockAgents.services.agent_engine import llm_service
+
+    engine = AgentEngine()
+    plan = ExecutionPlan(reasoning="r", steps=[])
+    deltas = ["a"] * 100
+    create = AsyncMock(return_value=FakeStream(deltas))
+
+    with patch.object(llm_service.client.chat.completions, "create", create):
+        frames = [
+            chunk
+            async for chunk in engine._generate_recommendation_stream("q", plan, {}, {})
+        ]
+
+    assert "".join(f["content"] for f in frames) == "a" * 100
+    assert len(frames) < len(deltas)
+
+
+@pytest.mark.asyncio
+async def test_closing_stream_cancels_prefetch():
+    """A client disconnect mid-workflow cancels outstanding data fetches."""
+    engine = AgentEngine()
+    plan = ExecutionPlan(
+        reasoning="r",
+        steps=[PlannerStep(tool="get_stock_data", args={"ticker": "AAPL"}, description="d")],
+    )
+    engine.planner.create_plan = AsyncMock(return_value=plan)
+
+    async def slow_fetch(ticker):
+        await asyncio.sleep(10)
+
+    engine._fetch_stock_data = slow_fetch
+    prefetch = engine._prefetch_stock_data
+    tasks = {}
+    engine._prefetch_stock_data = lambda p: tasks.update(prefetch(p)) or tasks
+
+    stream = engine.run_workflow_stream("Analyze AAPL", {})
+    async for chunk in stream:
+        if chunk["content"] == "Fetching Prices...":
+            break
+    await stream.aclose()
+    await asyncio.sleep(0)
+
+    assert tasks["AAPL"].cancelled()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_planner_caller_does_not_cancel_waiters():
+    """A client disconnecting mid-plan leaves the shared plan call running."""
+    completion = MagicMock()
+    completion.choices = [MagicMock()]
+    completion.choices[0].message.content = '{"reasoning": "r", "steps": []}'
+
+    async def slow_create(**kwargs):
+        await asyncio.sleep(0.02)
+        return completion
+
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=slow_create)
+    planner = LLMPlanner(client)
+
+    owner = asyncio.create_task(planner.create_plan("Should I buy NVDA?", {}))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(planner.create_plan("Should I buy NVDA?", {}))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert (await waiter).reasoning == "r"
+    assert owner.cancelled()
+    assert client.chat.completions.create.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_quant_steps_in_one_wave_share_a_batch():
+    """Several quant_analysis tickers in a wave go through one run_many call."""
+    from StockAgents.services.agent_engine import quant_agent
+
+    engine = AgentEngine()
+    plan = ExecutionPlan(
+        reasoning="r",
+        steps=[
+            PlannerStep(tool="quant_analysis", args={"ticker": "aapl"}, description="d"),
+            PlannerStep(tool="quant_analysis", args={"ticker": "MSFT"}, description="d"),
+        ],
+    )
+    engine.planner.create_plan = AsyncMock(return_value=plan)
+    engine._generate_recommendation_stream = lambda *args: _empty_stream()
+    run_many = AsyncMock(side_effect=lambda tickers, on_token=None: [{"ticker": t} for t in tickers])
+    run = AsyncMock()
+
+    with patch.object(quant_agent, "run_many", run_many), patch.object(quant_agent, "run", run):
+        state = {}
+        async for _ in engine.run_workflow_stream("Compare AAPL and MSFT risk", {}, state):
+            pass
+
+    run_many.assert_awaited_once_with(["AAPL", "MSFT"], on_token=ANY)
+    run.assert_not_awaited()
+    assert state["execution_results"] == {
+        "step_0_quant_analysis": {"ticker": "AAPL"},
+        "step_1_quant_analysis": {"ticker": "MSFT"},
+    }
+
+
+async def _empty_stream():
+    return
+    yield
+
+
+@pytest.mark.asyncio
+async def test_sub_agent_tokens_stream_before_synthesis():
+    """Research text reaches the stream as it is written; only synthesis is the answer."""
+    from StockAgents.services import researcher_agent as researcher_module
+    from StockAgents.services.agent_engine import llm_service
+
+    engine = AgentEngine()
+    plan = ExecutionPlan(
+        reasoning="r",
+        steps=[PlannerStep(tool="news_research", args={"query": "NVDA news"}, description="d")],
+    )
+    engine.planner.create_plan = AsyncMock(return_value=plan)
+    search = AsyncMock(return_value={"results": []})
+    create = AsyncMock(
+        side_effect=[FakeStream(["Chips ", "rally."]), FakeStream(["Buy."])]
+    )
+
+    with patch.object(researcher_module, "tavily_market_search_async", search), patch.object(
+        llm_service.client.chat.completions, "create", create
+    ):
+        state = {}
+        chunks = [c async for c in engine.run_workflow_stream("NVDA news?", {}, state)]
+
+    agent = [c for c in chunks if c["type"] == "agent_token"]
+    assert [c["content"] for c in agent] == ["Chips ", "rally."]
+    assert all(c["step"] == 0 and c["tool"] == "news_research" for c in agent)
+    assert chunks.index(agent[-1]) < chunks.index({"type": "status", "content": "Synthesizing recommendation..."})
+    assert "".join(c["content"] for c in chunks if c["type"] == "token") == "Buy."
+    assert state["execution_results"]["step_0_news_research"]["analysis"] == "Chips rally."
+    assert create.await_args_list[0].kwargs["stream"] is True
+
+
+class SlowStream(FakeStream):
+    """FakeStream whose deltas arrive after per-delta delays."""
+
+    def __init__(self, deltas, delays):
+        super().__init__(deltas)
+        self._delays = iter(delays)
+
+    async def __anext__(self):
+        await asyncio.sleep(next(self._delays, 0))
+        return await super().__anext__()
+
+
+@pytest.mark.asyncio
+async def test_synthesis_stream_flushes_buffer_when_model_pauses():
+    """Buffered text is sent after the flush interval, not held for the next delta."""
+    from StockAgents.services.agent_engine import TOKEN_FLUSH_INTERVAL, llm_service
+
+    engine = AgentEngine()
+    plan = ExecutionPlan(reasoning="r", steps=[])
+    pause = TOKEN_FLUSH_INTERVAL * 20
+    create = AsyncMock(return_value=SlowStream(["a", "b"], delays=[0, pause]))
+    loop = asyncio.get_running_loop()
+
+    with patch.object(llm_service.client.chat.completions, "create", create):
+        start = loop.time()
+        stream = engine._generate_recommendation_stream("q", plan, {}, {})
+        first = await stream.__anext__()
+        elapsed = loop.time() - start
+        rest = [chunk async for chunk in stream]
+
+    assert first["content"] == "a"
+    assert elapsed < pause / 2
+    assert "".join(f["content"] for f in rest) == "b"
@@ -0,0 +1,118 @@
+import os
+import asyncio
+import threading
+
+import pandas as pd
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+# Settings are parsed once; set the key before any service import
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from StockAgents.services import finnhub_client
+from StockAgents.services.finnhub_client import FinnhubClient
+
+
+@pytest.mark.asyncio
+async def test_filter_market_movers_fetches_concurrently():
+    """Quotes are fetched in parallel; failures are skipped, results sorted."""
+    client = FinnhubClient()
+    quotes = {"AAPL": {"c": 1, "dp": 2.0}, "MSFT": {"c": 2, "dp": 5.0}, "TSLA": {"c": 3, "dp": -1.0}}
+    running = 0
+    peak = 0
+
+    async def get_quote(symbol):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if symbol == "BAD":
+            raise RuntimeError("boom")
+        return quotes[symbol]
+
+    client.get_quote = get_quote
+    movers = await client.filter_market_movers(["AAPL", "BAD", "MSFT", "TSLA"])
+
+    assert peak == 4
+    assert [m["symbol"] for m in movers] == ["MSFT", "AAPL"]
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_analyst_ratings_scores_every_month():
+    """Latest month drives the headline score; each rated month is trended."""
+    client = FinnhubClient()
+    client.api_key = "key"
+    resp = MagicMock(status_code=200)
+    resp.json.return_value = [
+        {"period": "2024-03-01", "strongBuy": 10, "buy": 10, "hold": 0, "sell": 0, "strongSell": 0},
+        {"period": "2024-02-01", "strongBuy": 0, "buy": 0, "hold": 0, "sell": 0, "strongSell": 0},
+        {"period": "2024-01-01", "strongBuy": 0, "buy": 0, "hold": 10, "sell": 0, "strongSell": 0},
+    ]
+    client._client.get = AsyncMock(return_value=resp)
+
+    result = await client.get_analyst_ratings("TEST")
+
+    assert result["consensusScore"] == 87
+    assert result["recommendation"] == "STRONG BUY"
+    assert result["totalAnalysts"] == 20
+    assert result["consensusTrend"] == [
+        {"period": "2024-03-01", "consensusScore": 87},
+        {"period": "2024-01-01", "consensusScore": 50},
+    ]
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call():
+    """Simultaneous lookups of one symbol collapse to a single HTTP request."""
+    client = FinnhubClient()
+    client.api_key = "key"
+    resp = MagicMock(status_code=200)
+    resp.json.return_value = {"metric": {"beta": 1.2}}
+
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return resp
+
+    client._client.get = AsyncMock(side_effect=slow_get)
+
+    results = await asyncio.gather(
+        *(client.get_company_metrics("COAL") for _ in range(5))
+    )
+
+    assert all(r["beta"] == 1.2 for r in results)
+    assert client._client.get.await_count == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_candle_downloads_overlap(monkeypatch):
+    """Blocking yfinance downloads run in the I/O pool, not on the event loop."""
+    # Each download waits for the other; a serialized fetch breaks the barrier
+    barrier = threading.Barrier(2, timeout=2)
+    index = pd.date_range("2024-01-02", periods=2, freq="D")
+    frame = pd.DataFrame(
+        {"Close": [1.0, 2.0], "Open": 1.0, "High": 2.0, "Low": 1.0}, index=index
+    )
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, **kwargs):
+            barrier.wait()
+            return frame
+
+    monkeypatch.setattr(finnhub_client.yf, "Ticker", FakeTicker)
+    client = FinnhubClient()
+
+    first, second = await asyncio.gather(
+        client.get_candles("OVRA", time_range="1d"),
+        client.get_candles("OVRB", time_range="1d"),
+    )
+
+    assert first["s"] == "ok" and second["s"] == "ok"
+    assert first["c"] == [1.0, 2.0]
+    await client.aclose()
@@ -0,0 +1,95 @@
+import os
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+# LLMService builds its client at import time
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from StockAgents.services.llm_service import LLMService
+
+
+def make_completion(content):
+    completion = MagicMock()
+    completion.choices = [MagicMock()]
+    completion.choices[0].message.content = content
+    return completion
+
+
+def make_service(content):
+    service = LLMService()
+    service.client = MagicMock()
+    service.client.chat.completions.create = AsyncMock(
+        return_value=make_completion(content)
+    )
+    return service
+
+
+@pytest.mark.asyncio
+async def test_ticker_info_shared_between_wrappers():
+    """resolve_ticker and extract_tickers_list reuse one LLM round trip."""
+    service = make_service('{"primary": "aapl", "all": ["aapl", "nvda"]}')
+
+    primary = await service.resolve_ticker("Compare Apple and NVDA")
+    tickers = await service.extract_tickers_list("Compare Apple and NVDA")
+
+    assert primary == "AAPL"
+    assert tickers == ["AAPL", "NVDA"]
+    assert service.client.chat.completions.create.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_ticker_info_concurrent_callers_single_flight():
+    """Concurrent callers with the same query share the in-flight request."""
+    service = make_service('{"primary": "TSLA", "all": ["TSLA"]}')
+
+    results = await asyncio.gather(
+        *(service.resolve_ticker("How is Tesla doing") for _ in range(5))
+    )
+
+    assert results == ["TSLA"] * 5
+    assert service.client.chat.completions.create.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_ticker_info_failure_not_cached():
+    """A failed LLM call is retried on the next request."""
+    service = make_service('{"primary": "MSFT", "all": ["MSFT"]}')
+    create = service.client.chat.completions.create
+    create.side_effect = [Exception("API Error"), make_completion('{"primary": "MSFT", "all": ["MSFT"]}')]
+
+    assert await service.resolve_ticker("Analyze Microsoft") is None
+    assert await service.resolve_ticker("Analyze Microsoft") == "MSFT"
+    assert create.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_explicit_tickers_skip_llm():
+    """Queries that already contain known tickers never reach the LLM."""
+    service = make_service('{"primary": null, "all": []}')
+
+    assert await service.resolve_ticker("How is NVDA doing") == "NVDA"
+    assert await service.extract_tickers_list("Compare AAPL and MSFT") == ["AAPL", "MSFT"]
+    service.client.chat.completions.create.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ticker_info_drops_invalid_symbols():
+    """Malformed LLM output is dropped; well-formed symbols outside the universe are kept."""
+    service = make_service('{"primary": "hello world", "all": ["hello world", "brk.b", "123", "djt", "brk-b"]}')
+
+    assert await service.extract_tickers_list("Berkshire class B please") == ["BRK.B", "DJT", "BRK-B"]
+    assert await service.resolve_ticker("Berkshire class B please") == "BRK.B"
+
+
+@pytest.mark.asyncio
+async def test_structured_data_cached_by_normalized_query():
+    """Queries differing only in case/whitespace/punctuation share one call."""
+    service = make_service('{"AAPL": 5000}')
+
+    first = await service.extract_structured_data("I have 5k in Apple")
+    first["AAPL"] = 0  # Callers get their own copy
+    second = await service.extract_structured_data("  i have 5k in   apple. ")
+
+    assert second == {"AAPL": 5000}
+    assert service.client.chat.completions.create.await_count == 1
@@ -0,0 +1,66 @@
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+# Settings are parsed once; set the key before any service import
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from StockAgents.services.persistent_cache import PersistentCache, market_is_open
+
+NY = ZoneInfo("America/New_York")
+
+
+def test_round_trip_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = PersistentCache(path)
+    cache.set("AAPL:D:3m:2024-01-02", {"c": [1.5, 2.0], "s": "ok"}, ttl=60)
+    cache.close()
+
+    reopened = PersistentCache(path)
+    assert reopened.get("AAPL:D:3m:2024-01-02") == {"c": [1.5, 2.0], "s": "ok"}
+    assert reopened.get("MSFT:D:3m:2024-01-02") is None
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("k", {"s": "ok"}, ttl=-1)
+    assert cache.get("k") is None
+
+
+def test_expired_rows_purged_on_open(tmp_path):
+    """Dated keys are never rewritten, so stale rows must be deleted."""
+    path = str(tmp_path / "cache.sqlite3")
+    cache = PersistentCache(path)
+    cache.set("AAPL:D:3m:2024-01-02", {"s": "ok"}, ttl=-1)
+    cache.set("AAPL:D:3m:2024-01-03", {"s": "ok"}, ttl=60)
+    cache.close()
+
+    reopened = PersistentCache(path)
+    reopened.get("AAPL:D:3m:2024-01-03")
+    rows = reopened._conn.execute("SELECT key FROM cache").fetchall()
+    assert rows == [("AAPL:D:3m:2024-01-03",)]
+
+
+def test_market_hours():
+    assert market_is_open(datetime(2024, 1, 2, 10, 0, tzinfo=NY))
+    assert not market_is_open(datetime(2024, 1, 2, 17, 0, tzinfo=NY))
+    assert not market_is_open(datetime(2024, 1, 6, 10, 0, tzinfo=NY))  # Saturday
+
+
+def test_unwritable_path_disables_cache(tmp_path):
+    """A cache dir that can't be created turns the cache into a no-op."""
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    cache = PersistentCache(str(blocker / "cache.sqlite3"))
+
+    cache.set("k", {"s": "ok"}, ttl=60)
+    assert cache.get("k") is None
+
+
+@pytest.mark.asyncio
+async def test_async_round_trip(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite3"))
+    await cache.aset("k", {"s": "ok"}, ttl=60)
+    assert await cache.aget("k") == {"s": "ok"}
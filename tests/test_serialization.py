@@ -0,0 +1,21 @@
+import numpy as np
+
+from StockAgents.core.serialization import trim_lists
+
+
+def test_trim_lists_keeps_series_tail_only():
+    """Candle series keep their latest points; ranked lists are left whole."""
+    payload = {
+        "candles": {"c": list(range(30)), "t": np.arange(30), "s": "ok"},
+        "movers": [{"symbol": f"S{i}", "dp": 30 - i} for i in range(30)],
+        "ratings": {"consensusTrend": list(range(30)), "score": np.float64(1.5)},
+    }
+
+    trimmed = trim_lists(payload, max_items=5)
+
+    assert trimmed["candles"]["c"] == [25, 26, 27, 28, 29]
+    assert trimmed["candles"]["t"].tolist() == [25, 26, 27, 28, 29]
+    assert len(trimmed["movers"]) == 30 and trimmed["movers"][0]["symbol"] == "S0"
+    assert trimmed["ratings"]["consensusTrend"] == list(range(30))
+    assert trimmed["ratings"]["score"] == 1.5
+    assert len(payload["candles"]["c"]) == 30
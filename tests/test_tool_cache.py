@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from StockAgents.services.tool_cache import TTLCache, ttl_cache
+
+
+def test_ttl_cache_sync_hit_and_errors():
+    """Successful results are reused; error payloads are not cached."""
+    cache = TTLCache()
+    calls = []
+
+    @ttl_cache(key=lambda query: f"q:{query}", ttl=60, cache=cache)
+    def search(query):
+        calls.append(query)
+        return {"error": "down"} if query == "bad" else {"results": [query]}
+
+    assert search("AAPL") == {"results": ["AAPL"]}
+    assert search("AAPL") == {"results": ["AAPL"]}
+    search("bad")
+    search("bad")
+
+    assert calls == ["AAPL", "bad", "bad"]
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_async_expiry():
+    """Entries expire after their TTL."""
+    cache = TTLCache()
+    calls = []
+
+    @ttl_cache(key=lambda symbol: symbol, ttl=10, cache=cache)
+    async def fetch(symbol):
+        calls.append(symbol)
+        return {"ticker": symbol}
+
+    with patch("StockAgents.services.tool_cache.time.monotonic", return_value=100.0):
+        await fetch("MSFT")
+        await fetch("MSFT")
+    with patch("StockAgents.services.tool_cache.time.monotonic", return_value=111.0):
+        await fetch("MSFT")
+
+    assert calls == ["MSFT", "MSFT"]
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("a") == (True, 1)
+    assert cache.get("b") == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_async_single_flight():
+    """Concurrent misses for one key share a single call; stats count lookups."""
+    cache = TTLCache()
+    calls = []
+
+    @ttl_cache(key=lambda symbol: symbol, ttl=10, cache=cache)
+    async def fetch(symbol):
+        calls.append(symbol)
+        await asyncio.sleep(0.01)
+        return {"ticker": symbol}
+
+    results = await asyncio.gather(*(fetch("NVDA") for _ in range(5)))
+    await fetch("NVDA")
+
+    assert results == [{"ticker": "NVDA"}] * 5
+    assert calls == ["NVDA"]
+    assert (cache.hits, cache.misses) == (1, 5)
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_cancelled_caller_does_not_cancel_waiters():
+    """One caller disconnecting leaves the shared in-flight call running."""
+    cache = TTLCache()
+    calls = []
+
+    @ttl_cache(key=lambda symbol: symbol, ttl=10, cache=cache)
+    async def fetch(symbol):
+        calls.append(symbol)
+        await asyncio.sleep(0.02)
+        return {"ticker": symbol}
+
+    owner = asyncio.create_task(fetch("AAPL"))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(fetch("AAPL"))
+    await asyncio.sleep(0)
+    owner.cancel()
+
+    assert await waiter == {"ticker": "AAPL"}
+    assert owner.cancelled()
+    assert calls == ["AAPL"]
+    assert cache.get("AAPL") == (True, {"ticker": "AAPL"})
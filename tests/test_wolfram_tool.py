@@ -0,0 +1,156 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from StockAgents.tools import wolfram_tool
+from StockAgents.tools.wolfram_tool import python_compute_volatility
+
+
+@pytest.fixture(params=[True, False], ids=["numba", "numpy"])
+def kernel(request, monkeypatch):
+    if request.param and not wolfram_tool.NUMBA_AVAILABLE:
+        pytest.skip("numba not installed")
+    monkeypatch.setattr(wolfram_tool, "NUMBA_AVAILABLE", request.param)
+
+
+def test_python_volatility_matches_reference(kernel):
+    """Non-positive prices drop the returns that touch them."""
+    prices = [100.0, 101.5, 0.0, 99.0, 102.0, 103.5, 101.0]
+    returns = [
+        math.log(b / a) for a, b in zip(prices, prices[1:]) if a > 0 and b > 0
+    ]
+    mean = sum(returns) / len(returns)
+    daily = math.sqrt(sum((r - mean) ** 2 for r in returns) / len(returns))
+
+    result = python_compute_volatility(prices)
+
+    assert result["dailyVolatility"] == round(daily, 6)
+    assert result["annualizedVolatility"] == round(daily * math.sqrt(252), 4)
+    assert result["trend"] == "UP"
+    assert result["dataPoints"] == len(prices)
+
+
+def test_python_volatility_without_valid_returns(kernel):
+    assert python_compute_volatility([0.0, 0.0, 0.0]) == {
+        "error": "Could not calculate returns"
+    }
+
+
+def test_volatility_batch_uses_one_cloud_call(monkeypatch):
+    """All tickers with enough data go out in a single evaluation."""
+    calls = []
+
+    def evaluate(expr):
+        calls.append(expr)
+        return {
+            "AAPL": {"dailyVolatility": 0.01, "source": "wolfram_cloud"},
+            "MSFT": {"dailyVolatility": 0.02, "source": "wolfram_cloud"},
+        }
+
+    monkeypatch.setattr(wolfram_tool, "WOLFRAM_AVAILABLE", True)
+    monkeypatch.setattr(wolfram_tool, "WOLFRAM_KEY_ID", "id")
+    monkeypatch.setattr(wolfram_tool, "WOLFRAM_KEY_SECRET", "secret")
+    monkeypatch.setattr(wolfram_tool, "wlexpr", lambda code: code, raising=False)
+    monkeypatch.setattr(
+        wolfram_tool, "wl", SimpleNamespace(Map=lambda fn, assoc: assoc), raising=False
+    )
+    monkeypatch.setattr(wolfram_tool, "_evaluate", evaluate)
+
+    prices = [100.0 + i for i in range(12)]
+    results = wolfram_tool.wolfram_compute_volatility_batch(
+        {"AAPL": prices, "MSFT": prices, "TINY": [1.0, 2.0]}
+    )
+
+    assert len(calls) == 1
+    assert calls[0] == {"AAPL": prices, "MSFT": prices}
+    assert results["AAPL"]["dailyVolatility"] == 0.01
+    assert results["MSFT"]["dailyVolatility"] == 0.02
+    assert "error" in results["TINY"]
+
+
+def test_risk_analysis_many_batches_volatility(monkeypatch):
+    histories = {
+        "AAPL": {"prices": [100.0 + i for i in range(30)]},
+        "NEW": {"prices": [10.0, 11.0]},
+        "GONE": {"error": "No historical data found"},
+    }
+    monkeypatch.setattr(
+        wolfram_tool,
+        "get_historical_prices_many",
+        lambda tickers, days, threads: {t: histories[t] for t in tickers},
+    )
+    batches = []
+
+    def batch(prices_by_ticker):
+        batches.append(prices_by_ticker)
+        return {t: python_compute_volatility(p) for t, p in prices_by_ticker.items()}
+
+    monkeypatch.setattr(wolfram_tool, "wolfram_compute_volatility_batch", batch)
+
+    results = wolfram_tool.wolfram_risk_analysis_many(
+        ["aapl", "NEW", "GONE", "bad-1", "AAPL"],
+        metrics={"AAPL": {"beta": 1.2}},
+        analyst_ratings={"AAPL": {"recommendation": "Buy", "consensusScore": 4.1}},
+    )
+
+    assert len(batches) == 1 and list(batches[0]) == ["AAPL"]
+    assert results["AAPL"]["beta"] == 1.2
+    assert results["AAPL"]["analystRecommendation"] == "Buy"
+    assert results["AAPL"]["dataPoints"] == 30 and results["AAPL"]["trend"] == "UP"
+    assert "volatilityError" in results["NEW"]
+    assert results["GONE"]["dataPoints"] == 0
+    assert results["BAD-1"] == {"error": "Invalid ticker format"}
+
+
+def test_risk_analysis_accepts_ndarray_prices(monkeypatch):
+    """get_historical_prices hands back float64 arrays; no list round-trip needed."""
+    monkeypatch.setattr(wolfram_tool, "WOLFRAM_AVAILABLE", False)
+    prices = np.linspace(100.0, 130.0, 30)
+
+    result = wolfram_tool.wolfram_risk_analysis("AAPL", prices=prices)
+
+    assert result["dataPoints"] == 30
+    assert result["trend"] == "UP"
+
+
+@pytest.mark.skipif(not wolfram_tool.WOLFRAM_AVAILABLE, reason="wolframclient not installed")
+def test_evaluate_reuses_pooled_sessions_concurrently(monkeypatch):
+    """Sessions are reused, and up to WOLFRAM_SESSIONS evaluate at once."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    started = []
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    class FakeSession:
+        def __init__(self, credentials):
+            started.append(self)
+
+        def start(self):
+            pass
+
+        def evaluate(self, expr):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return expr
+
+    monkeypatch.setattr(wolfram_tool, "WolframCloudSession", FakeSession)
+    monkeypatch.setattr(wolfram_tool, "_idle_sessions", wolfram_tool.queue.LifoQueue())
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(wolfram_tool._evaluate, range(16)))
+    wolfram_tool._evaluate("again")
+
+    assert results == list(range(16))
+    assert 1 < peak <= wolfram_tool.WOLFRAM_SESSIONS
+    assert len(started) <= wolfram_tool.WOLFRAM_SESSIONS
@@ -0,0 +1,77 @@
+import os
+
+import pandas as pd
+import pytest
+
+# Settings are parsed once; set the key before any service import
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from StockAgents.services.tool_cache import tool_cache
+from StockAgents.tools import yfinance_tool
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    tool_cache.clear()
+    yield
+    tool_cache.clear()
+
+
+class FakeTicker:
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = 0
+
+    def history(self, start, end):
+        self.calls += 1
+        return self.frame
+
+
+def test_history_cached_per_ticker_and_day(monkeypatch):
+    """Repeat same-day lookups skip yfinance; results are float64/datetime64 arrays."""
+    index = pd.date_range("2024-01-02", periods=3, freq="D", tz="America/New_York")
+    fake = FakeTicker(pd.DataFrame({"Close": [1, 2, 3]}, index=index))
+    monkeypatch.setattr(yfinance_tool, "_ticker", lambda symbol: fake)
+
+    first = yfinance_tool.get_historical_prices("aapl")
+    second = yfinance_tool.get_historical_prices("AAPL ", days=90)
+
+    assert fake.calls == 1
+    assert second is first
+    assert first["prices"].dtype == "float64"
+    assert str(first["dates"][0]) == "2024-01-02"
+
+
+def test_empty_history_not_cached(monkeypatch):
+    fake = FakeTicker(pd.DataFrame({"Close": []}))
+    monkeypatch.setattr(yfinance_tool, "_ticker", lambda symbol: fake)
+
+    yfinance_tool.get_historical_prices("NEW")
+    result = yfinance_tool.get_historical_prices("NEW")
+
+    assert "error" in result
+    assert fake.calls == 2
+
+
+def test_history_many_downloads_in_chunks(monkeypatch):
+    """Uncached tickers are fetched with one yf.download per chunk."""
+    monkeypatch.setattr(yfinance_tool, "HISTORY_CHUNK", 2)
+    index = pd.date_range("2024-01-02", periods=3, freq="D")
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(list(tickers))
+        columns = pd.MultiIndex.from_product([[t for t in tickers if t != "GONE"], ["Close"]])
+        return pd.DataFrame(1.0, index=index, columns=columns)
+
+    monkeypatch.setattr(yfinance_tool.yf, "download", download)
+    tool_cache.set(yfinance_tool._history_key("AAPL"), {"cached": True}, 60)
+
+    results = yfinance_tool.get_historical_prices_many(["aapl", "MSFT", "NVDA", "GONE"])
+
+    assert calls == [["MSFT", "NVDA"], ["GONE"]]
+    assert list(results) == ["AAPL", "MSFT", "NVDA", "GONE"]
+    assert results["AAPL"] == {"cached": True}
+    assert results["MSFT"]["count"] == 3
+    assert "error" in results["GONE"]
+    assert yfinance_tool.get_historical_prices("NVDA") is results["NVDA"]